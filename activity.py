@@ -0,0 +1,194 @@
+import atexit
+import os
+import threading
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import case, delete, event, select
+
+import metrics
+import serve
+from analytics import DIALECT_INSERTS
+from models import db, Lesson, Module, Purchase, LessonActivity
+
+# Atividade dos alunos nas aulas (última aula vista e posição do vídeo), enviada pelo
+# player a cada poucos segundos. Os eventos não vão direto para o banco: ficam num
+# buffer em memória do processo, um valor por (user_id, lesson_id) — o mais recente
+# vence —, e uma thread grava tudo num único upsert em lote a cada
+# ACTIVITY_FLUSH_INTERVAL segundos, ou antes, quando o buffer passa de
+# ACTIVITY_BUFFER_SIZE pares. Na saída do processo (atexit, ou fim do worker no
+# `flask serve`) o que sobrou é gravado.
+#
+# Se o processo morrer sem sair normalmente, perde-se no máximo o último intervalo.
+metrics.METRICS.update({
+    'activity_events_total': ('counter', 'Eventos de atividade recebidos.'),
+    'activity_rows_flushed_total': ('counter', 'Linhas de atividade gravadas (após agrupar por aluno e aula).'),
+    'activity_flush_errors_total': ('counter', 'Gravações do buffer de atividade que falharam.'),
+})
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_buffer = {}   # (user_id, lesson_id) -> (position, updated_at)
+_allowed = set()  # (user_id, lesson_id) com acesso confirmado
+_state = {'app': None, 'pid': None, 'wake': None}
+ALLOWED_CACHE_SIZE = 100_000
+
+
+def can_track(user, lesson_id):
+    """O aluno comprou o curso da aula? Só respostas positivas ficam em cache."""
+    key = (user.id, lesson_id)
+    if key in _allowed:
+        return True
+    if user.is_admin:
+        allowed = db.session.get(Lesson, lesson_id) is not None
+    else:
+        allowed = db.session.execute(
+            select(Purchase.id).join(Module, Module.course_id == Purchase.course_id)
+            .join(Lesson, Lesson.module_id == Module.id)
+            .where(Purchase.user_id == user.id, Lesson.id == lesson_id).limit(1)
+        ).first() is not None
+    if allowed:
+        if len(_allowed) >= ALLOWED_CACHE_SIZE:
+            _allowed.clear()
+        _allowed.add(key)
+    return allowed
+
+
+def record(user_id, lesson_id, position):
+    _start_flusher()
+    with _lock:
+        _buffer[(user_id, lesson_id)] = (position, datetime.utcnow())
+        full = len(_buffer) >= current_app.config['ACTIVITY_BUFFER_SIZE']
+    metrics.inc('activity_events_total')
+    if full:
+        _state['wake'].set()
+
+
+def position(user_id, lesson_id):
+    """Última posição conhecida (o buffer tem prioridade sobre o banco)."""
+    with _lock:
+        buffered = _buffer.get((user_id, lesson_id))
+    if buffered is not None:
+        return buffered[0]
+    return db.session.execute(
+        select(LessonActivity.position)
+        .where(LessonActivity.user_id == user_id, LessonActivity.lesson_id == lesson_id)
+    ).scalar() or 0
+
+
+def _forget_buffered(lesson_ids):
+    with _lock:
+        for key in [key for key in _buffer if key[1] in lesson_ids]:
+            del _buffer[key]
+        _allowed.difference_update({key for key in _allowed if key[1] in lesson_ids})
+
+
+def forget_lessons(lesson_ids):
+    """Apaga a atividade das aulas excluídas por DELETE em massa, na transação do chamador.
+
+    LessonActivity não tem FK para lesson: sem isto as linhas ficariam para sempre. As
+    exclusões pelo ORM (aula, módulo ou curso) passam por _lesson_deleted.
+    """
+    lesson_ids = set(lesson_ids)
+    if lesson_ids:
+        db.session.execute(delete(LessonActivity).where(LessonActivity.lesson_id.in_(lesson_ids)))
+        _forget_buffered(lesson_ids)
+
+
+@event.listens_for(Lesson, 'after_delete')
+def _lesson_deleted(mapper, connection, lesson):
+    connection.execute(delete(LessonActivity).where(LessonActivity.lesson_id == lesson.id))
+    _forget_buffered({lesson.id})
+
+
+def _upsert(connection, rows):
+    table = LessonActivity.__table__
+    insert = DIALECT_INSERTS[connection.dialect.name](table)
+    # Dois workers podem gravar o mesmo par fora de ordem: só o evento mais novo vale
+    if connection.dialect.name == 'mysql':
+        newer = insert.inserted.updated_at >= table.c.updated_at
+        stmt = insert.on_duplicate_key_update([
+            ('position', case((newer, insert.inserted.position), else_=table.c.position)),
+            ('updated_at', case((newer, insert.inserted.updated_at), else_=table.c.updated_at)),
+        ])
+    else:
+        stmt = insert.on_conflict_do_update(
+            index_elements=['user_id', 'lesson_id'],
+            set_={'position': insert.excluded.position, 'updated_at': insert.excluded.updated_at},
+            where=insert.excluded.updated_at >= table.c.updated_at,
+        )
+    connection.execute(stmt, rows)
+
+
+def flush():
+    """Grava o buffer num upsert em lote. Retorna quantas linhas foram gravadas."""
+    global _buffer
+    with _flush_lock:
+        with _lock:
+            pending, _buffer = _buffer, {}
+        if not pending:
+            return 0
+        rows = [{'user_id': user_id, 'lesson_id': lesson_id, 'position': value, 'updated_at': updated_at}
+                for (user_id, lesson_id), (value, updated_at) in pending.items()]
+        app = _state['app']
+        try:
+            with app.app_context(), db.engine.begin() as connection:
+                _upsert(connection, rows)
+        except Exception:
+            # Devolve ao buffer sem sobrescrever eventos que chegaram nesse meio-tempo
+            with _lock:
+                for key, value in pending.items():
+                    current = _buffer.get(key)
+                    if current is None or current[1] < value[1]:
+                        _buffer[key] = value
+            metrics.inc('activity_flush_errors_total')
+            app.logger.exception('Falha ao gravar %d linha(s) de atividade', len(rows))
+            return 0
+        metrics.inc('activity_rows_flushed_total', len(rows))
+        return len(rows)
+
+
+def _flush_loop(wake, interval):
+    while _state['wake'] is wake:
+        wake.wait(interval)
+        wake.clear()
+        flush()
+
+
+def _start_flusher():
+    # Uma thread por processo; depois de um fork o filho começa a sua
+    pid = os.getpid()
+    if _state['pid'] == pid:
+        return
+    with _lock:
+        if _state['pid'] == pid:
+            return
+        wake = threading.Event()
+        _state['wake'] = wake
+        _state['pid'] = pid
+        interval = current_app.config['ACTIVITY_FLUSH_INTERVAL']
+        threading.Thread(target=_flush_loop, args=(wake, interval), name='activity-flush', daemon=True).start()
+
+
+def _after_fork():
+    # O buffer herdado pertence ao processo pai (que o gravará); o filho começa vazio
+    global _lock, _flush_lock, _buffer
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _buffer = {}
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+@serve.on_worker_exit
+def flush_activity(app):
+    flush()
+
+
+def init_app(app):
+    app.config.setdefault('ACTIVITY_FLUSH_INTERVAL', 5.0)
+    app.config.setdefault('ACTIVITY_BUFFER_SIZE', 5000)
+    _state['app'] = app
+    atexit.register(flush)
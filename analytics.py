@@ -0,0 +1,208 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from jobs import enqueue, handler
+from models import (
+    db, Course, Module, Lesson, Purchase, LessonCompletion,
+    CourseStats, LessonStats, DailyPurchases,
+)
+
+# Os relatórios do admin leem só as tabelas de resumo. Elas são atualizadas na
+# mesma transação de cada compra/conclusão (eventos do ORM abaixo) e reconstruídas
+# por curso em segundo plano quando a estrutura muda (aulas criadas ou excluídas).
+DIALECT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+    'mysql': mysql.insert,
+}
+
+
+def increment(connection, model, keys, extra=None, **increments):
+    """INSERT ... ON CONFLICT que soma ``increments`` à linha de ``keys`` (criando-a se preciso)."""
+    table = model.__table__
+    stmt = DIALECT_INSERTS[connection.dialect.name](table).values(**keys, **(extra or {}), **increments)
+    if connection.dialect.name == 'mysql':
+        stmt = stmt.on_duplicate_key_update({k: table.c[k] + v for k, v in increments.items()})
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={k: table.c[k] + v for k, v in increments.items()},
+        )
+    connection.execute(stmt)
+
+
+def record_purchase(connection, course_id, purchased_at):
+    price = connection.execute(select(Course.price).where(Course.id == course_id)).scalar() or 0
+    increment(connection, CourseStats, {'course_id': course_id}, purchases=1, revenue=price)
+    increment(connection, DailyPurchases, {'day': purchased_at.date(), 'course_id': course_id},
+              purchases=1, revenue=price)
+
+
+def record_completion(connection, user_id, lesson_id):
+    course_id = connection.execute(
+        select(Module.course_id).join(Lesson, Lesson.module_id == Module.id).where(Lesson.id == lesson_id)
+    ).scalar()
+    if course_id is None:
+        return
+    increment(connection, LessonStats, {'lesson_id': lesson_id}, extra={'course_id': course_id}, completions=1)
+
+    # Esta conclusão fechou o curso? (consulta limitada às aulas de um curso)
+    course_lessons = select(Lesson.id).join(Module, Lesson.module_id == Module.id).where(Module.course_id == course_id)
+    total = connection.execute(select(func.count()).select_from(course_lessons.subquery())).scalar()
+    done = connection.execute(
+        select(func.count()).select_from(LessonCompletion)
+        .where(LessonCompletion.user_id == user_id, LessonCompletion.lesson_id.in_(course_lessons))
+    ).scalar()
+    if total and done == total:
+        increment(connection, CourseStats, {'course_id': course_id}, completed_students=1)
+
+
+@event.listens_for(Purchase, 'after_insert')
+def _purchase_inserted(mapper, connection, purchase):
+    record_purchase(connection, purchase.course_id, purchase.purchase_date or datetime.utcnow())
+
+
+@event.listens_for(LessonCompletion, 'after_insert')
+def _completion_inserted(mapper, connection, completion):
+    record_completion(connection, completion.user_id, completion.lesson_id)
+
+
+def schedule_rebuild(course_id):
+    """Agenda a reconstrução do resumo de um curso (gravada com o commit do chamador)."""
+    return enqueue('analytics_rebuild', {'course_id': course_id})
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def rebuild(course_ids=None):
+    """Recalcula os resumos a partir do histórico (todos os cursos ou só ``course_ids``)."""
+    session = db.session
+    for model in (CourseStats, LessonStats, DailyPurchases):
+        stmt = delete(model)
+        if course_ids is not None:
+            stmt = stmt.where(model.course_id.in_(course_ids))
+        session.execute(stmt)
+
+    courses = select(Course.id)
+    if course_ids is not None:
+        courses = courses.where(Course.id.in_(course_ids))
+    course_ids = list(session.scalars(courses))
+    if not course_ids:
+        return 0
+
+    purchases = {
+        row.course_id: row for row in session.execute(
+            select(Purchase.course_id, func.count().label('purchases'), func.sum(Course.price).label('revenue'))
+            .join(Course, Purchase.course_id == Course.id)
+            .where(Purchase.course_id.in_(course_ids)).group_by(Purchase.course_id)
+        )
+    }
+    lessons = session.execute(
+        select(Lesson.id, Module.course_id).join(Module, Lesson.module_id == Module.id)
+        .where(Module.course_id.in_(course_ids))
+    ).all()
+    completions = dict(session.execute(
+        select(LessonCompletion.lesson_id, func.count())
+        .join(Lesson, LessonCompletion.lesson_id == Lesson.id)
+        .join(Module, Lesson.module_id == Module.id)
+        .where(Module.course_id.in_(course_ids))
+        .group_by(LessonCompletion.lesson_id)
+    ).all())
+
+    # Alunos que concluíram todas as aulas, em uma passada pelas conclusões de todos os cursos
+    per_user = (
+        select(Module.course_id, LessonCompletion.user_id, func.count().label('done'))
+        .join(Lesson, LessonCompletion.lesson_id == Lesson.id)
+        .join(Module, Lesson.module_id == Module.id)
+        .where(Module.course_id.in_(course_ids))
+        .group_by(Module.course_id, LessonCompletion.user_id)
+        .subquery()
+    )
+    totals = (
+        select(Module.course_id, func.count(Lesson.id).label('total'))
+        .join(Lesson, Lesson.module_id == Module.id)
+        .where(Module.course_id.in_(course_ids))
+        .group_by(Module.course_id)
+        .subquery()
+    )
+    completed = dict(session.execute(
+        select(per_user.c.course_id, func.count())
+        .join(totals, totals.c.course_id == per_user.c.course_id)
+        .where(per_user.c.done == totals.c.total)
+        .group_by(per_user.c.course_id)
+    ).all())
+
+    course_rows = []
+    for course_id in course_ids:
+        row = purchases.get(course_id)
+        course_rows.append({
+            'course_id': course_id,
+            'purchases': row.purchases if row else 0,
+            'revenue': (row.revenue or 0) if row else 0,
+            'completed_students': completed.get(course_id, 0),
+        })
+    session.execute(CourseStats.__table__.insert(), course_rows)
+
+    if lessons:
+        session.execute(LessonStats.__table__.insert(), [
+            {'lesson_id': lesson.id, 'course_id': lesson.course_id, 'completions': completions.get(lesson.id, 0)}
+            for lesson in lessons
+        ])
+
+    day = func.date(Purchase.purchase_date)
+    daily = session.execute(
+        select(day.label('day'), Purchase.course_id, func.count().label('purchases'),
+               func.sum(Course.price).label('revenue'))
+        .join(Course, Purchase.course_id == Course.id)
+        .where(Purchase.course_id.in_(course_ids), Purchase.purchase_date.is_not(None))
+        .group_by(day, Purchase.course_id)
+    ).all()
+    if daily:
+        session.execute(DailyPurchases.__table__.insert(), [
+            {'day': _as_date(row.day), 'course_id': row.course_id,
+             'purchases': row.purchases, 'revenue': row.revenue or 0}
+            for row in daily
+        ])
+    return len(course_ids)
+
+
+@handler('analytics_rebuild')
+def _rebuild_batch(payloads):
+    rebuild(sorted({p['course_id'] for p in payloads}))
+    return [None] * len(payloads)
+
+
+def course_report():
+    # Cursos ainda sem vendas não têm linha de resumo: aparecem com zeros
+    purchases = func.coalesce(CourseStats.purchases, 0).label('purchases')
+    return db.session.execute(
+        select(Course.id, Course.title, purchases, func.coalesce(CourseStats.revenue, 0).label('revenue'),
+               func.coalesce(CourseStats.completed_students, 0).label('completed_students'))
+        .outerjoin(CourseStats, CourseStats.course_id == Course.id)
+        .order_by(purchases.desc(), Course.id)
+    ).all()
+
+
+def lesson_report(course_id):
+    return db.session.execute(
+        select(Lesson.id, Lesson.title, Module.title.label('module_title'),
+               func.coalesce(LessonStats.completions, 0).label('completions'))
+        .join(Module, Lesson.module_id == Module.id)
+        .outerjoin(LessonStats, LessonStats.lesson_id == Lesson.id)
+        .where(Module.course_id == course_id)
+        .order_by(Module.order, Module.id, Lesson.order, Lesson.id)
+    ).all()
+
+
+def daily_report(days=30):
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    return db.session.execute(
+        select(DailyPurchases.day, func.sum(DailyPurchases.purchases).label('purchases'),
+               func.sum(DailyPurchases.revenue).label('revenue'))
+        .where(DailyPurchases.day >= since)
+        .group_by(DailyPurchases.day).order_by(DailyPurchases.day)
+    ).all()
@@ -1,34 +1,169 @@
-from flask import Flask, render_template, request, url_for, redirect, flash, session, jsonify, abort
+from flask import Flask, render_template, request, url_for, redirect, flash, session, jsonify, abort, send_from_directory, stream_with_context
 from markupsafe import escape
 from forms import (
     RegistrationForm, LoginForm, EsqueciForm, EditarPerfilForm, AlterarSenhaForm,
-    CourseForm, ModuleForm, LessonForm, MentoringSessionForm, RegistrationForm, ProfileForm, MentorshipForm
+    CourseForm, ModuleForm, LessonForm, MentoringSessionForm, RegistrationForm, ProfileForm, MentorshipForm,
+    RedefinirSenhaForm
 )
-from models import db, User, Course, Module, Lesson, Purchase, Mentorship
+from models import db, User, Course, Module, Lesson, Purchase, Mentorship, Upload, LessonCompletion
+from models import COURSE_LIST, COURSE_DETAIL, LESSON_DETAIL
+from mailer import mentoria_agendada
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
+from flask_wtf.csrf import validate_csrf
+from wtforms.validators import ValidationError
 from functools import wraps
 import os
+import shutil
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 import click
+from sqlalchemy.exc import IntegrityError
+from jobs import send_email, run_workers
+import ordering
+import compression
+import uploads
+import blobstore
+import routing
+import serve
+import metrics
+import analytics
+import recommendations
+import exports
+import seed
+import profiles
+import availability
+import rendering
+import request_log
+import freeze
+import activity
+import catalog
+import mentorships
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'sua-chave-secreta'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///site.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Réplicas de leitura, separadas por vírgula (ex.: DB_REPLICA_URLS=sqlite:///replica.db).
+# SELECTs de requisições GET vão para elas; escritas e leituras logo após uma escrita do
+# próprio usuário (por DB_REPLICA_STICKY_SECONDS) vão para o primário.
+app.config['SQLALCHEMY_BINDS'] = {
+    f'replica_{i}': url
+    for i, url in enumerate(filter(None, os.environ.get('DB_REPLICA_URLS', '').split(',')), 1)
+}
+app.config['DB_REPLICAS'] = list(app.config['SQLALCHEMY_BINDS'])
+app.config['DB_REPLICA_STICKY_SECONDS'] = 5
 app.config['UPLOAD_FOLDER'] = os.path.join('static', 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max-limit
+# Vídeos das aulas ficam fora de static/: só são servidos após checar a compra
+app.config['VIDEO_FOLDER'] = os.path.join(app.instance_path, 'videos')
+# Com um proxy na frente, delega o envio do arquivo a ele:
+#   'x-accel' (nginx, location interna em VIDEO_ACCEL_PREFIX) ou 'x-sendfile' (Apache/lighttpd)
+app.config['VIDEO_OFFLOAD'] = os.environ.get('VIDEO_OFFLOAD')
+app.config['VIDEO_ACCEL_PREFIX'] = '/protected-videos/'
+app.config['MATERIAL_FOLDER'] = os.path.join(app.instance_path, 'materiais')
+# Uploads retomáveis (/uploads): cada PATCH continua limitado a MAX_CONTENT_LENGTH,
+# mas o arquivo inteiro pode chegar a UPLOAD_MAX_SIZE
+app.config['UPLOAD_PARTIAL_FOLDER'] = os.path.join(app.instance_path, 'uploads-parciais')
+app.config['UPLOAD_MAX_SIZE'] = 5 * 1024 * 1024 * 1024
+# Uploads sem nenhum pedaço novo por esse tempo são removidos por `flask uploads-expire`
+app.config['UPLOAD_EXPIRY_HOURS'] = 24
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
+# Email (enviado pelos workers da fila; em desenvolvimento use um servidor SMTP local,
+# ex.: python -m aiosmtpd -n -l localhost:1025)
+app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'localhost')
+app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 1025))
+app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS') == '1'
+app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
+app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', 'contato@plataforma.com')
+
+# Fila de jobs
+app.config['JOBS_WORKERS'] = int(os.environ.get('JOBS_WORKERS', 2))
+app.config['JOBS_MAX_ATTEMPTS'] = 5
+app.config['JOBS_RETRY_BASE'] = 30  # segundos; dobra a cada tentativa
+app.config['JOBS_RETRY_MAX'] = 3600
+app.config['JOBS_LOCK_TIMEOUT'] = 600
+
+# Conexões abertas por engine em cada worker antes de aceitar tráfego (flask serve)
+app.config['SERVE_WARM_CONNECTIONS'] = 2
+
+# Métricas (/metrics): retratos por processo em METRICS_DIR, somados na leitura.
+# Com METRICS_TOKEN definido, o endpoint exige 'Authorization: Bearer <token>'
+app.config['METRICS_DIR'] = os.path.join(app.instance_path, 'metrics')
+app.config['METRICS_FLUSH_INTERVAL'] = 1.0
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+# Log JSON das requisições (LOG_FILE vazio = stdout). Sucessos são amostrados por
+# endpoint; erros e requisições com mais de LOG_SLOW_MS ms são sempre registrados
+app.config['LOG_FILE'] = os.environ.get('LOG_FILE')
+app.config['LOG_SAMPLE_RATE'] = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+app.config['LOG_SAMPLE_RATES'] = {'home': 0.1, 'cursos': 0.1, 'curso_detail': 0.1, 'api_atividade': 0.01,
+                                  'static': 0.01, 'metrics': 0.0}
+app.config['LOG_SLOW_MS'] = 500
+app.config['LOG_QUEUE_SIZE'] = 10000
+
+# Índice de disponibilidade de username/email (filtro de Bloom por processo):
+# taxa de falsos positivos, intervalo para incorporar cadastros e alterações de outros
+# workers, sobreposição (segundos) dessa leitura e intervalo da reconstrução completa
+app.config['AVAILABILITY_ERROR_RATE'] = 0.01
+app.config['AVAILABILITY_REFRESH_SECONDS'] = 1.0
+app.config['AVAILABILITY_REFRESH_OVERLAP'] = 60
+app.config['AVAILABILITY_REBUILD_SECONDS'] = 3600
+# /api/disponibilidade: consultas permitidas por IP a cada janela (segundos)
+app.config['AVAILABILITY_RATE_LIMIT'] = 30
+app.config['AVAILABILITY_RATE_WINDOW'] = 60
+
+# Atividade nas aulas (posição do vídeo): eventos agrupados em memória e gravados
+# em lote a cada ACTIVITY_FLUSH_INTERVAL segundos ou ao juntar ACTIVITY_BUFFER_SIZE pares
+app.config['ACTIVITY_FLUSH_INTERVAL'] = 5.0
+app.config['ACTIVITY_BUFFER_SIZE'] = 5000
+
+# Catálogo público exportado como HTML estático (flask freeze)
+app.config['FREEZE_DIR'] = os.environ.get('FREEZE_DIR', os.path.join(app.instance_path, 'freeze'))
+
+# Catálogo (/cursos): cursos por página e validade das contagens de facetas em cache
+# (o próprio processo as descarta ao gravar um curso; outros workers veem após o TTL)
+app.config['CATALOG_PER_PAGE'] = 24
+app.config['CATALOG_FACETS_TTL'] = 60
+
+# Perfis públicos em cache por processo (o próprio processo troca a entrada ao gravar o
+# usuário ou os cursos dele; outros workers veem após o TTL)
+app.config['PROFILE_CACHE_TTL'] = 60
+app.config['PROFILE_CACHE_SIZE'] = 10000
+
+# Feeds .ics de mentorias: janela (em dias) para trás e para frente a partir de hoje
+app.config['MENTORSHIP_FEED_PAST_DAYS'] = 30
+app.config['MENTORSHIP_FEED_FUTURE_DAYS'] = 365
+
+# Recomendações "quem comprou também comprou" por curso
+app.config['RECOMMENDATIONS_TOP_K'] = 4
+
+# Compressão gzip/br de respostas dinâmicas a partir deste tamanho (bytes)
+app.config['COMPRESS_MIN_SIZE'] = 500
+
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+os.makedirs(app.config['VIDEO_FOLDER'], exist_ok=True)
+os.makedirs(app.config['MATERIAL_FOLDER'], exist_ok=True)
+os.makedirs(app.config['UPLOAD_PARTIAL_FOLDER'], exist_ok=True)
 
 # Initialize extensions
 db.init_app(app)
 migrate = Migrate(app, db)
+compression.init_app(app)
+routing.init_app(app)
+metrics.init_app(app)
+request_log.init_app(app)
+availability.init_app(app)
+freeze.init_app(app)
+activity.init_app(app)
+catalog.init_app(app)
+profiles.init_app(app)
+mentorships.init_app(app)
 
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -50,7 +185,7 @@ def admin_required(f):
 
 @app.route("/")
 def home():
-    courses = Course.query.filter_by(is_featured=True).all()
+    courses = Course.query.options(*COURSE_LIST).filter_by(is_featured=True).all()
     purchases = []
     if current_user.is_authenticated:
         purchases = [p.course_id for p in current_user.purchases]
@@ -62,6 +197,7 @@ def cadastro():
         return redirect(url_for('home'))
     
     form = RegistrationForm()
+    # A unicidade é validada no formulário (índice de disponibilidade), antes do hash da senha
     if form.validate_on_submit():
         hashed_password = generate_password_hash(form.password.data)
         user = User(
@@ -70,11 +206,41 @@ def cadastro():
             password=hashed_password
         )
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Corrida com outro cadastro do mesmo nome entre a validação e o commit
+            db.session.rollback()
+            flash('Nome de usuário ou email já está em uso.', 'danger')
+            return render_template('cadastro.html', form=form)
         flash('Conta criada com sucesso! Agora você pode fazer login.', 'success')
         return redirect(url_for('login'))
     return render_template('cadastro.html', form=form)
 
+@app.route('/api/disponibilidade')
+def api_disponibilidade():
+    # ?username=...&email=... -> {"username": true, "email": false} (true = disponível)
+    # Só para o formulário de cadastro (token CSRF da sessão dele no cabeçalho) e com
+    # limite por IP: não pode virar um jeito de listar quais emails estão cadastrados,
+    # o que esqueci_senha evita de propósito.
+    try:
+        validate_csrf(request.headers.get('X-CSRFToken'))
+    except ValidationError:
+        return jsonify({'success': False, 'message': 'Token CSRF inválido'}), 400
+    if not availability.allow_lookup(request.remote_addr):
+        response = jsonify({'success': False, 'message': 'Muitas consultas. Tente novamente em instantes.'})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(app.config['AVAILABILITY_RATE_WINDOW'])
+        return response
+    result = {}
+    for field in availability.FIELDS:
+        value = request.args.get(field, '').strip()
+        if value:
+            result[field] = not availability.is_taken(field, value)
+    response = jsonify(result)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route("/login", methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
@@ -106,16 +272,44 @@ def esqueci_senha():
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
         if user:
-            # Aqui você implementaria o envio de email
-            flash('Se o email existir em nossa base, você receberá instruções para redefinir sua senha.', 'info')
+            link = url_for('redefinir_senha', token=user.get_reset_token(), _external=True)
+            send_email(
+                user.email,
+                'Redefinição de senha',
+                f'Olá, {user.username}!\n\n'
+                f'Para redefinir sua senha, acesse o link abaixo (válido por 1 hora):\n{link}\n\n'
+                'Se você não solicitou a redefinição, ignore este email.'
+            )
+            db.session.commit()
+        flash('Se o email existir em nossa base, você receberá instruções para redefinir sua senha.', 'info')
         return redirect(url_for('login'))
     return render_template('esqueci_senha.html', form=form)
 
+@app.route('/redefinir-senha/<token>', methods=['GET', 'POST'])
+def redefinir_senha(token):
+    if current_user.is_authenticated:
+        return redirect(url_for('home'))
+
+    user = User.verify_reset_token(token)
+    if user is None:
+        flash('Link inválido ou expirado. Solicite uma nova redefinição.', 'warning')
+        return redirect(url_for('esqueci_senha'))
+
+    form = RedefinirSenhaForm()
+    if form.validate_on_submit():
+        user.set_password(form.nova_senha.data)
+        db.session.commit()
+        flash('Senha redefinida com sucesso! Agora você pode fazer login.', 'success')
+        return redirect(url_for('login'))
+    return render_template('redefinir_senha.html', form=form, token=token)
+
 @app.route('/profile/<username>')
 @login_required
 def show_user_profile(username):
-    user = User.query.filter_by(username=username).first_or_404()
-    return render_template('profile.html', user=user)
+    profile = profiles.get(username)
+    if profile is None:
+        abort(404)
+    return render_template('profile.html', profile=profile, username=profile['username'])
 
 @app.route('/editar-perfil', methods=['GET', 'POST'])
 @login_required
@@ -123,9 +317,7 @@ def editar_perfil():
     form = ProfileForm()
     if form.validate_on_submit():
         if form.profile_picture.data:
-            filename = secure_filename(form.profile_picture.data.filename)
-            form.profile_picture.data.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-            current_user.profile_picture = filename
+            current_user.profile_picture = blobstore.store(form.profile_picture.data)
         
         current_user.username = form.username.data
         current_user.email = form.email.data
@@ -167,8 +359,7 @@ def admin():
     
     courses = Course.query.all()
     users = User.query.all()
-    mentorias = Mentorship.query.all()
-    return render_template('admin.html', courses=courses, users=users, mentorias=mentorias)
+    return render_template('admin.html', courses=courses, users=users)
 
 @app.route('/admin/toggle/<int:user_id>', methods=['POST'])
 @login_required
@@ -182,21 +373,81 @@ def toggle_admin(user_id):
     db.session.commit()
     return jsonify({'success': True})
 
+def ids_from_request():
+    """Lê a lista de ids de um JSON {"ids": [...]} ou de campos de formulário ``ids``."""
+    data = request.get_json(silent=True)
+    raw = data.get('ids', []) if isinstance(data, dict) else request.form.getlist('ids')
+    ids = []
+    for value in raw:
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return list(dict.fromkeys(ids))
+
+def batch_results(ids, found, errors=None):
+    errors = errors or {}
+    results = {}
+    for item_id in ids:
+        if item_id in errors:
+            results[item_id] = {'success': False, 'message': errors[item_id]}
+        elif item_id in found:
+            results[item_id] = {'success': True}
+        else:
+            results[item_id] = {'success': False, 'message': 'Não encontrado'}
+    return jsonify({'success': all(r['success'] for r in results.values()), 'results': results})
+
+@app.route('/admin/usuarios/toggle', methods=['POST'])
+@login_required
+@admin_required
+def toggle_admin_lote():
+    ids = ids_from_request()
+    errors = {}
+    if current_user.id in ids:
+        errors[current_user.id] = 'Você não pode alterar seu próprio status de administrador'
+    target = [i for i in ids if i not in errors]
+    found = {row.id for row in db.session.query(User.id).filter(User.id.in_(target))}
+    if found:
+        User.query.filter(User.id.in_(found)).update(
+            {User.is_admin: db.not_(db.func.coalesce(User.is_admin, False))},
+            synchronize_session=False
+        )
+    db.session.commit()
+    return batch_results(ids, found, errors)
+
 @app.route('/cursos')
 def cursos():
-    courses = Course.query.all()
+    filters, sort = catalog.parse_args(request.args)
+    facets, total = catalog.facets(filters)
+    page = catalog.search(filters, sort, page=request.args.get('pagina', 1, type=int),
+                          total=total, options=COURSE_LIST)
+    if not page.items and page.page > page.pages:
+        return redirect(url_for('cursos', **dict(request.args, pagina=page.pages)))
     purchases = []
     if current_user.is_authenticated:
         purchases = [p.course_id for p in current_user.purchases]
-    return render_template('cursos.html', courses=courses, purchases=purchases)
+    return render_template('cursos.html', courses=page.items, page=page, facets=facets,
+                           filters=filters, sort=sort, sorts=catalog.SORTS, purchases=purchases)
+
+# Campos expostos pela API do catálogo (também usados pela versão async em asgi.py)
+CATALOG_API_COLUMNS = (Course.id, Course.title, Course.price, Course.level,
+                       Course.duration, Course.is_featured, Course.image)
+
+@app.route('/api/cursos')
+def api_cursos():
+    rows = db.session.execute(db.select(*CATALOG_API_COLUMNS).order_by(Course.id))
+    return jsonify([row._asdict() for row in rows])
 
 @app.route('/curso/<int:course_id>')
 def curso_detail(course_id):
-    course = Course.query.get_or_404(course_id)
+    course = Course.query.options(*COURSE_DETAIL).get_or_404(course_id)
     purchase = None
     if current_user.is_authenticated:
         purchase = Purchase.query.filter_by(user_id=current_user.id, course_id=course_id).first()
-    return render_template('curso_detail.html', course=course, purchase=purchase)
+    recommended = recommendations.for_course(course_id)
+    students = db.session.query(db.func.count(Purchase.id)).filter(Purchase.course_id == course_id).scalar()
+    return render_template('curso_detail.html', course=course, purchase=purchase, recommended=recommended,
+                           students=students)
 
 @app.route('/comprar/<int:course_id>', methods=['POST'])
 @login_required
@@ -208,7 +459,9 @@ def comprar_curso(course_id):
     
     purchase = Purchase(user_id=current_user.id, course_id=course_id)
     db.session.add(purchase)
+    recommendations.schedule_update(current_user.id, course_id)
     db.session.commit()
+    metrics.inc('purchases_total')
     
     flash('Curso adquirido com sucesso!', 'success')
     return redirect(url_for('curso_detail', course_id=course_id))
@@ -216,51 +469,129 @@ def comprar_curso(course_id):
 @app.route('/meus-cursos')
 @login_required
 def meus_cursos():
-    purchases = Purchase.query.filter_by(user_id=current_user.id).all()
-    courses = [p.course for p in purchases]
-    return render_template('meus_cursos.html', courses=courses)
+    purchases = (Purchase.query.filter_by(user_id=current_user.id)
+                 .options(db.joinedload(Purchase.course).options(*COURSE_LIST)).all())
+    # Progresso de todos os cursos em duas consultas agrupadas, sem carregar o sumário de cada um
+    course_ids = [p.course_id for p in purchases]
+    totals = dict(db.session.query(Module.course_id, db.func.count(Lesson.id)).join(Lesson)
+                  .filter(Module.course_id.in_(course_ids)).group_by(Module.course_id).all())
+    completed = dict(db.session.query(Module.course_id, db.func.count(LessonCompletion.id))
+                     .join(Lesson, Lesson.module_id == Module.id)
+                     .join(LessonCompletion, LessonCompletion.lesson_id == Lesson.id)
+                     .filter(Module.course_id.in_(course_ids), LessonCompletion.user_id == current_user.id)
+                     .group_by(Module.course_id).all())
+    progress = {course_id: 100 * completed.get(course_id, 0) / totals[course_id] if totals.get(course_id) else 0
+                for course_id in course_ids}
+    return render_template('meus_cursos.html', purchases=purchases, progress=progress)
+
+def lesson_neighbors(course_id, lesson_id):
+    """(anterior, próxima) na ordem do sumário do curso, só com os ids das aulas.
+
+    Levanta 404 se a aula não pertence ao curso.
+    """
+    ids = [row.id for row in db.session.query(Lesson.id).join(Module)
+           .filter(Module.course_id == course_id)
+           .order_by(Module.order, Module.id, Lesson.order, Lesson.id)]
+    if lesson_id not in ids:
+        abort(404)
+    position = ids.index(lesson_id)
+    prev_id = ids[position - 1] if position > 0 else None
+    next_id = ids[position + 1] if position < len(ids) - 1 else None
+    return prev_id, next_id
+
+def can_watch(course_id):
+    return current_user.is_admin or db.session.query(
+        Purchase.query.filter_by(user_id=current_user.id, course_id=course_id).exists()
+    ).scalar()
 
 @app.route('/aula/<int:course_id>/<int:lesson_id>')
 @login_required
 def aula_detail(course_id, lesson_id):
     course = Course.query.get_or_404(course_id)
-    lesson = Lesson.query.get_or_404(lesson_id)
+    lesson = Lesson.query.options(*LESSON_DETAIL).get_or_404(lesson_id)
     
     # Verificar se o usuário comprou o curso
-    purchase = Purchase.query.filter_by(user_id=current_user.id, course_id=course_id).first()
-    if not purchase and not current_user.is_admin:
+    if not can_watch(course_id):
         flash('Você precisa comprar este curso para acessar as aulas.', 'warning')
         return redirect(url_for('curso_detail', course_id=course_id))
     
-    # Encontrar a próxima e anterior aula
-    current_module = lesson.module
-    current_module_index = course.modules.index(current_module)
-    current_lesson_index = current_module.lessons.index(lesson)
-    
-    next_lesson = None
-    prev_lesson = None
-    
-    # Próxima aula
-    if current_lesson_index < len(current_module.lessons) - 1:
-        next_lesson = current_module.lessons[current_lesson_index + 1]
-    elif current_module_index < len(course.modules) - 1:
-        next_module = course.modules[current_module_index + 1]
-        if next_module.lessons:
-            next_lesson = next_module.lessons[0]
-    
-    # Aula anterior
-    if current_lesson_index > 0:
-        prev_lesson = current_module.lessons[current_lesson_index - 1]
-    elif current_module_index > 0:
-        prev_module = course.modules[current_module_index - 1]
-        if prev_module.lessons:
-            prev_lesson = prev_module.lessons[-1]
+    prev_id, next_id = lesson_neighbors(course_id, lesson_id)
     
+    completed_ids = {row.lesson_id for row in db.session.query(LessonCompletion.lesson_id)
+                     .join(Lesson).join(Module)
+                     .filter(LessonCompletion.user_id == current_user.id, Module.course_id == course_id)}
+
     return render_template('aula_detail.html', 
                          course=course, 
+                         course_id=course_id,
                          lesson=lesson, 
-                         next_lesson=next_lesson, 
-                         prev_lesson=prev_lesson)
+                         content_html=rendering.html(lesson),
+                         position=activity.position(current_user.id, lesson.id) if lesson.video_file else 0,
+                         prev_id=prev_id,
+                         next_id=next_id,
+                         completed_ids=completed_ids)
+
+# Só o corpo da aula e os vizinhos, para a navegação sem recarregar a página:
+# sem layout, sumário do curso nem consulta de conclusões
+@app.route('/aula/<int:course_id>/<int:lesson_id>/fragmento')
+@login_required
+def aula_fragmento(course_id, lesson_id):
+    lesson = Lesson.query.options(*LESSON_DETAIL).get_or_404(lesson_id)
+    if not can_watch(course_id):
+        abort(403)
+    prev_id, next_id = lesson_neighbors(course_id, lesson_id)
+    html = render_template('aula_corpo.html', lesson=lesson, course_id=course_id,
+                           content_html=rendering.html(lesson), prev_id=prev_id, next_id=next_id,
+                           position=activity.position(current_user.id, lesson.id) if lesson.video_file else 0)
+    response = jsonify({'id': lesson.id, 'title': lesson.title, 'html': html,
+                        'prev_id': prev_id, 'next_id': next_id})
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/aula/<int:lesson_id>/video')
+@login_required
+def aula_video(lesson_id):
+    lesson = Lesson.query.get_or_404(lesson_id)
+    if not lesson.video_file:
+        abort(404)
+
+    # Uma única checagem por requisição; cada pedido de Range é uma requisição nova
+    if not current_user.is_admin:
+        purchased = db.session.query(Purchase.id).filter_by(
+            user_id=current_user.id, course_id=lesson.module.course_id
+        ).first()
+        if not purchased:
+            abort(403)
+
+    offload = app.config['VIDEO_OFFLOAD']
+    if offload == 'x-accel':
+        response = app.response_class()
+        response.headers['X-Accel-Redirect'] = app.config['VIDEO_ACCEL_PREFIX'] + lesson.video_file
+    elif offload == 'x-sendfile':
+        response = app.response_class()
+        response.headers['X-Sendfile'] = os.path.join(app.config['VIDEO_FOLDER'], lesson.video_file)
+    else:
+        # conditional=True responde Range com 206 lendo só o trecho pedido, em blocos;
+        # sob gunicorn/uwsgi o wsgi.file_wrapper usa sendfile()
+        response = send_from_directory(app.config['VIDEO_FOLDER'], lesson.video_file, conditional=True)
+    response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+@app.route('/aula/<int:lesson_id>/material')
+@login_required
+def aula_material(lesson_id):
+    lesson = Lesson.query.get_or_404(lesson_id)
+    if not lesson.material_file:
+        abort(404)
+    if not current_user.is_admin:
+        purchased = db.session.query(Purchase.id).filter_by(
+            user_id=current_user.id, course_id=lesson.module.course_id
+        ).first()
+        if not purchased:
+            abort(403)
+    response = send_from_directory(app.config['MATERIAL_FOLDER'], lesson.material_file, conditional=True)
+    response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response
 
 @app.route('/mentorias', methods=['GET', 'POST'])
 @login_required
@@ -270,21 +601,95 @@ def mentorias():
     if form.validate_on_submit():
         session = Mentorship(
             user_id=current_user.id,
+            subject='Mentoria',
+            description=form.notes.data or '',
             scheduled_date=form.date.data,
+            duration=form.duration.data,
             notes=form.notes.data,
             status='pending',
             created_at=datetime.utcnow()
         )
         db.session.add(session)
+        send_email(current_user.email, *mentoria_agendada(current_user.username, form.date.data))
         db.session.commit()
+        metrics.inc('mentorships_scheduled_total')
         flash('Mentoria agendada com sucesso!', 'success')
         return redirect(url_for('mentorias'))
 
-    sessions = Mentorship.query.filter_by(user_id=current_user.id).order_by(Mentorship.scheduled_date.desc()).all()
-    now = datetime.now()
-    return render_template('agendar_mentoria.html', form=form, sessions=sessions, now=now)
+    period = mentorships.parse_period(request.args)
+    sessions = mentorships.between(period.start, period.end, user_id=current_user.id)
+    feed_url = url_for('mentorias_ics', token=current_user.get_calendar_token(), _external=True)
+    return render_template('agendar_mentoria.html', form=form, period=period,
+                           weeks=mentorships.weeks(period, sessions), feed_url=feed_url)
+
+def ics_response(user_id, name):
+    etag = mentorships.etag(user_id)
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+    # ETag conferido antes de abrir o cursor: o 304 custa só a consulta agregada
+    if request.if_none_match.contains_weak(etag):
+        return app.response_class(status=304, headers=headers)
+    return app.response_class(
+        stream_with_context(mentorships.stream_ics(user_id, name, request.host.split(':')[0])),
+        mimetype='text/calendar', headers=headers,
+    )
+
+@app.route('/mentorias/<token>.ics')
+def mentorias_ics(token):
+    user = User.verify_calendar_token(token)
+    if user is None:
+        abort(404)
+    return ics_response(user.id, f'Mentorias - {user.username}')
 
 # Rotas administrativas
+@app.route('/admin/mentorias')
+@login_required
+@admin_required
+def admin_mentorias():
+    period = mentorships.parse_period(request.args)
+    sessions = mentorships.between(period.start, period.end)
+    feed_url = url_for('admin_mentorias_ics', token=current_user.get_calendar_token(), _external=True)
+    return render_template('admin/mentorias.html', period=period,
+                           weeks=mentorships.weeks(period, sessions), feed_url=feed_url)
+
+@app.route('/admin/mentorias/<token>.ics')
+def admin_mentorias_ics(token):
+    user = User.verify_calendar_token(token)
+    if user is None or not user.is_admin:
+        abort(404)
+    return ics_response(None, 'Mentorias - todas')
+
+@app.route('/admin/relatorios')
+@login_required
+@admin_required
+def admin_relatorios():
+    # Lê só as tabelas de resumo: o tempo da página não cresce com o histórico
+    courses = analytics.course_report()
+    selected = request.args.get('curso', type=int) or (courses[0].id if courses else None)
+    lessons = analytics.lesson_report(selected) if selected else []
+    purchases = {course.id: course.purchases for course in courses}.get(selected, 0)
+    daily = analytics.daily_report(30)
+    return render_template('admin/relatorios.html', courses=courses, selected=selected,
+                           lessons=lessons, purchases=purchases, daily=daily,
+                           max_daily=max((day.purchases for day in daily), default=0))
+
+@app.route('/admin/exportar/<arquivo>')
+@login_required
+@admin_required
+def admin_exportar(arquivo):
+    # <nome>.<csv|jsonl>[.gz], ex.: compras.csv.gz
+    nome, _, formato = arquivo.partition('.')
+    fmt, _, compressed = formato.partition('.')
+    if nome not in exports.EXPORTS or fmt not in exports.FORMATS or compressed not in ('', 'gz'):
+        abort(404)
+    filename = f'{nome}-{datetime.utcnow():%Y%m%d}.{formato}'
+    response = app.response_class(
+        stream_with_context(exports.stream(nome, fmt, compress=bool(compressed))),
+        mimetype='application/gzip' if compressed else exports.FORMATS[fmt],
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/admin/cursos')
 @login_required
 @admin_required
@@ -307,13 +712,12 @@ def novo_curso():
             price=form.price.data,
             level=form.level.data,
             duration=form.duration.data,
-            is_featured=form.is_featured.data
+            is_featured=form.is_featured.data,
+            instructor_id=current_user.id
         )
         
         if form.image.data:
-            filename = secure_filename(form.image.data.filename)
-            form.image.data.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-            course.image = filename
+            course.image = blobstore.store(form.image.data)
         
         db.session.add(course)
         db.session.commit()
@@ -341,9 +745,7 @@ def editar_curso(course_id):
         course.is_featured = form.is_featured.data
         
         if form.image.data:
-            filename = secure_filename(form.image.data.filename)
-            form.image.data.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-            course.image = filename
+            course.image = blobstore.store(form.image.data)
         
         db.session.commit()
         flash('Curso atualizado com sucesso!', 'success')
@@ -360,6 +762,7 @@ def deletar_curso(course_id):
     
     course = Course.query.get_or_404(course_id)
     db.session.delete(course)
+    analytics.schedule_rebuild(course_id)
     db.session.commit()
     flash('Curso deletado com sucesso!', 'success')
     return redirect(url_for('admin_cursos'))
@@ -378,7 +781,8 @@ def novo_modulo(course_id):
         module = Module(
             title=form.title.data,
             description=form.description.data,
-            course_id=course_id
+            course_id=course_id,
+            order=ordering.next_order(Module, 'course_id', course_id)
         )
         db.session.add(module)
         db.session.commit()
@@ -402,9 +806,13 @@ def nova_aula(module_id):
             title=form.title.data,
             content=form.content.data,
             video_url=form.video_url.data,
-            module_id=module_id
+            duration=form.duration.data,
+            module_id=module_id,
+            order=ordering.next_order(Lesson, 'module_id', module_id)
         )
         db.session.add(lesson)
+        # Uma aula nova muda quem concluiu o curso: recalcula o resumo em segundo plano
+        analytics.schedule_rebuild(module.course_id)
         db.session.commit()
         flash('Aula criada com sucesso!', 'success')
         return redirect(url_for('editar_curso', course_id=module.course_id))
@@ -417,18 +825,158 @@ def nova_aula(module_id):
 def excluir_modulo(module_id):
     module = Module.query.get_or_404(module_id)
     db.session.delete(module)
+    analytics.schedule_rebuild(module.course_id)
     db.session.commit()
     return jsonify({'success': True})
 
+@app.route('/admin/modulos/excluir', methods=['POST'])
+@login_required
+@admin_required
+def excluir_modulos():
+    ids = ids_from_request()
+    found = {row.id for row in db.session.query(Module.id).filter(Module.id.in_(ids))}
+    course_ids = {row.course_id for row in db.session.query(Module.course_id).filter(Module.id.in_(found))}
+    if found:
+        # DELETE em massa não passa pelo cascade do ORM: remove as dependências antes
+        lesson_ids = [row.id for row in db.session.query(Lesson.id).filter(Lesson.module_id.in_(found))]
+        LessonCompletion.query.filter(LessonCompletion.lesson_id.in_(lesson_ids)).delete(synchronize_session=False)
+        activity.forget_lessons(lesson_ids)
+        Lesson.query.filter(Lesson.module_id.in_(found)).delete(synchronize_session=False)
+        Module.query.filter(Module.id.in_(found)).delete(synchronize_session=False)
+    for course_id in course_ids:
+        analytics.schedule_rebuild(course_id)
+    # DELETEs em massa não disparam os eventos do ORM que mantêm a exportação estática
+    freeze.schedule(course_ids)
+    db.session.commit()
+    return batch_results(ids, found)
+
 @app.route('/admin/aula/<int:lesson_id>/excluir', methods=['POST'])
 @login_required
 @admin_required
 def excluir_aula(lesson_id):
     lesson = Lesson.query.get_or_404(lesson_id)
     db.session.delete(lesson)
+    analytics.schedule_rebuild(lesson.module.course_id)
     db.session.commit()
     return jsonify({'success': True})
 
+@app.route('/admin/aulas/excluir', methods=['POST'])
+@login_required
+@admin_required
+def excluir_aulas():
+    ids = ids_from_request()
+    found = {row.id for row in db.session.query(Lesson.id).filter(Lesson.id.in_(ids))}
+    course_ids = {row.course_id for row in db.session.query(Module.course_id).join(Lesson)
+                  .filter(Lesson.id.in_(found))}
+    if found:
+        LessonCompletion.query.filter(LessonCompletion.lesson_id.in_(found)).delete(synchronize_session=False)
+        activity.forget_lessons(found)
+        Lesson.query.filter(Lesson.id.in_(found)).delete(synchronize_session=False)
+    for course_id in course_ids:
+        analytics.schedule_rebuild(course_id)
+    freeze.schedule(course_ids)
+    db.session.commit()
+    return batch_results(ids, found)
+
+@app.route('/admin/modulo/<int:module_id>/mover', methods=['POST'])
+@login_required
+@admin_required
+def mover_modulo(module_id):
+    module = Module.query.get_or_404(module_id)
+    data = request.get_json(silent=True) or {}
+    try:
+        ordering.move(module, Module, 'course_id', data.get('after_id'))
+    except ValueError as exc:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(exc)}), 400
+    db.session.commit()
+    return jsonify({'success': True, 'order': module.order})
+
+@app.route('/admin/aula/<int:lesson_id>/mover', methods=['POST'])
+@login_required
+@admin_required
+def mover_aula(lesson_id):
+    lesson = Lesson.query.get_or_404(lesson_id)
+    data = request.get_json(silent=True) or {}
+    target_module_id = data.get('module_id', lesson.module_id)
+    if target_module_id != lesson.module_id:
+        target = db.session.get(Module, target_module_id)
+        if target is None or target.course_id != lesson.module.course_id:
+            return jsonify({'success': False, 'message': 'Módulo de destino inválido'}), 400
+        lesson.module_id = target.id
+    try:
+        ordering.move(lesson, Lesson, 'module_id', data.get('after_id'))
+    except ValueError as exc:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(exc)}), 400
+    db.session.commit()
+    return jsonify({'success': True, 'order': lesson.order})
+
+def tus_response(status=204, **headers):
+    response = app.response_class(status=status)
+    response.headers['Tus-Resumable'] = uploads.TUS_VERSION
+    response.headers['Cache-Control'] = 'no-store'
+    for name, value in headers.items():
+        response.headers[name.replace('_', '-')] = str(value)
+    return response
+
+def tus_error(error):
+    response = jsonify({'success': False, 'message': str(error)})
+    response.status_code = error.status
+    response.headers['Tus-Resumable'] = uploads.TUS_VERSION
+    return response
+
+@app.route('/uploads', methods=['OPTIONS', 'POST'])
+@login_required
+@admin_required
+def upload_criar():
+    if request.method == 'OPTIONS':
+        return tus_response(Tus_Version=uploads.TUS_VERSION, Tus_Extension=uploads.TUS_EXTENSIONS,
+                            Tus_Max_Size=app.config['UPLOAD_MAX_SIZE'], Tus_Checksum_Algorithm='sha256')
+    try:
+        length = int(request.headers.get('Upload-Length', ''))
+        upload = uploads.create(current_user, length, uploads.parse_metadata(request.headers.get('Upload-Metadata')))
+    except ValueError:
+        return tus_error(uploads.UploadError('Upload-Length obrigatório'))
+    except uploads.UploadError as exc:
+        db.session.rollback()
+        return tus_error(exc)
+    db.session.commit()
+    return tus_response(201, Location=url_for('upload_enviar', upload_id=upload.id), Upload_Offset=upload.offset)
+
+@app.route('/uploads/<upload_id>', methods=['HEAD', 'PATCH', 'DELETE'])
+@login_required
+@admin_required
+def upload_enviar(upload_id):
+    upload = Upload.query.filter_by(id=upload_id, user_id=current_user.id).first_or_404()
+    if request.method == 'HEAD':
+        return tus_response(200, Upload_Offset=upload.offset, Upload_Length=upload.length)
+    if request.method == 'DELETE':
+        try:
+            with uploads.locked(upload):
+                uploads.discard(upload)
+                db.session.commit()
+        except uploads.UploadError as exc:
+            db.session.rollback()
+            return tus_error(exc)
+        return tus_response()
+
+    if request.mimetype != 'application/offset+octet-stream':
+        return tus_error(uploads.UploadError('Content-Type inválido', 415))
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return tus_error(uploads.UploadError('Upload-Offset obrigatório'))
+    try:
+        # O commit fica dentro da trava: o próximo PATCH precisa ver o offset novo
+        with uploads.locked(upload):
+            uploads.append(upload, request.stream, offset, request.headers.get('Upload-Checksum'))
+            db.session.commit()
+    except uploads.UploadError as exc:
+        db.session.rollback()
+        return tus_error(exc)
+    return tus_response(Upload_Offset=upload.offset)
+
 @app.route('/aula/<int:lesson_id>/completar', methods=['POST'])
 @login_required
 def completar_aula(lesson_id):
@@ -441,10 +989,40 @@ def completar_aula(lesson_id):
     if not purchase:
         return jsonify({'success': False, 'error': 'Curso não comprado'})
     
-    lesson.completed = True
-    db.session.commit()
+    if not LessonCompletion.query.filter_by(user_id=current_user.id, lesson_id=lesson.id).first():
+        db.session.add(LessonCompletion(user_id=current_user.id, lesson_id=lesson.id))
+        db.session.commit()
+        metrics.inc('lessons_completed_total')
     return jsonify({'success': True})
 
+# Posição do vídeo enviada pelo player a cada poucos segundos: só entra no buffer
+# (activity.py), sem commit por requisição
+@app.route('/api/atividade', methods=['POST'])
+@login_required
+def api_atividade():
+    data = request.get_json(silent=True) or {}
+    try:
+        lesson_id = int(data['lesson_id'])
+        position = float(data.get('position', 0))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Evento inválido'}), 400
+    if not 0 <= position < 7 * 24 * 3600:  # também recusa NaN
+        return jsonify({'success': False, 'error': 'Posição inválida'}), 400
+    if not activity.can_track(current_user, lesson_id):
+        return jsonify({'success': False, 'error': 'Curso não comprado'}), 403
+    activity.record(current_user.id, lesson_id, position)
+    return jsonify({'success': True}), 202
+
+@app.route('/metrics')
+def metrics_endpoint():
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(401)
+    response = app.response_class(metrics.render(), mimetype='text/plain')
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -465,6 +1043,180 @@ def create_super_user(username, email, password):
     db.session.commit()
     click.echo('Superusuário criado com sucesso!')
 
+# CLI: associa um arquivo de vídeo local a uma aula
+@app.cli.command('video-attach')
+@click.argument('lesson_id', type=int)
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def video_attach(lesson_id, path):
+    """Copia um vídeo para VIDEO_FOLDER e o associa à aula."""
+    lesson = db.session.get(Lesson, lesson_id)
+    if lesson is None:
+        click.echo('Aula não encontrada.')
+        return
+    filename = f'aula-{lesson.id}-{secure_filename(os.path.basename(path))}'
+    shutil.copyfile(path, os.path.join(app.config['VIDEO_FOLDER'], filename))
+    lesson.video_file = filename
+    db.session.commit()
+    click.echo(f'Vídeo associado à aula {lesson.id}: {filename}')
+
+# CLI: remove imagens que nenhum usuário ou curso usa mais
+@app.cli.command('blobs-gc')
+@click.option('--grace-hours', type=float, default=1.0, help='Preserva blobs usados há menos tempo que isso')
+@click.option('--dry-run', is_flag=True, help='Apenas lista o que seria removido')
+def blobs_gc(grace_hours, dry_run):
+    """Coleta os blobs órfãos do armazenamento de uploads."""
+    orphans = blobstore.collect_garbage(timedelta(hours=grace_hours), dry_run=dry_run)
+    for row in orphans:
+        click.echo(f'{"(simulação) " if dry_run else ""}{row.name} ({row.size} B)')
+    total = sum(row.size for row in orphans)
+    click.echo(f'{len(orphans)} blob(s), {total} B {"seriam liberados" if dry_run else "liberados"}.')
+
+# CLI: remove uploads retomáveis abandonados
+@app.cli.command('uploads-expire')
+def uploads_expire():
+    """Remove uploads não concluídos parados há mais de UPLOAD_EXPIRY_HOURS."""
+    expired = uploads.expire()
+    db.session.commit()
+    for upload in expired:
+        click.echo(f'{upload.id} {upload.filename} ({upload.offset}/{upload.length} B)')
+    click.echo(f'{len(expired)} upload(s) expirado(s) removido(s).')
+
+# CLI: copia o banco SQLite primário para as réplicas (desenvolvimento)
+@app.cli.command('replica-sync')
+@click.option('--interval', type=float, default=0, help='Repete a cada N segundos (0 = uma vez)')
+def replica_sync(interval):
+    """Sincroniza as réplicas SQLite de DB_REPLICA_URLS com o banco primário."""
+    import time
+    if not app.config['DB_REPLICAS']:
+        click.echo('Nenhuma réplica configurada (DB_REPLICA_URLS).')
+        return
+    engines = [db.engines[key] for key in app.config['DB_REPLICAS']]
+    if db.engine.dialect.name != 'sqlite' or any(e.dialect.name != 'sqlite' for e in engines):
+        click.echo('replica-sync só funciona com SQLite; use a replicação do próprio banco.')
+        return
+    while True:
+        routing.sync_sqlite(db.engine.url.database, [e.url.database for e in engines])
+        click.echo(f'Réplicas sincronizadas: {len(engines)}')
+        if not interval:
+            break
+        time.sleep(interval)
+
+# CLI: servidor de produção (pre-fork com aquecimento)
+@app.cli.command('serve')
+@click.option('--bind', default='127.0.0.1:8000', help='Endereço:porta')
+@click.option('--workers', type=int, default=None, help='Processos (padrão: 2 x CPUs + 1)')
+@click.option('--threads', type=int, default=1, help='Threads por processo')
+@click.option('--max-requests', type=int, default=1000, help='Recicla o worker após N requisições (0 = nunca)')
+@click.option('--max-requests-jitter', type=int, default=100, help='Variação aleatória de --max-requests')
+def serve_command(bind, workers, threads, max_requests, max_requests_jitter):
+    """Serve a aplicação com workers pré-carregados e aquecidos."""
+    try:
+        serve.run(app, bind=bind, workers=workers, threads=threads,
+                  max_requests=max_requests, max_requests_jitter=max_requests_jitter)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+
+# CLI: processa a fila de jobs (emails e notificações)
+@app.cli.command('worker')
+@click.option('--processes', type=int, default=None, help='Número de processos (padrão: JOBS_WORKERS)')
+@click.option('--batch-size', type=int, default=20, help='Jobs reservados por vez em cada processo')
+@click.option('--poll-interval', type=float, default=1.0, help='Espera em segundos quando a fila está vazia')
+def worker(processes, batch_size, poll_interval):
+    """Executa os workers da fila de jobs."""
+    processes = processes or app.config['JOBS_WORKERS']
+    click.echo(f'Iniciando {processes} worker(s)...')
+    run_workers(processes, batch_size, poll_interval)
+
+# CLI: recalcula as tabelas de resumo dos relatórios
+@app.cli.command('analytics-rebuild')
+@click.option('--course', 'course_ids', type=int, multiple=True, help='Só estes cursos (padrão: todos)')
+def analytics_rebuild(course_ids):
+    """Reconstrói os resumos de compras e conclusões a partir do histórico."""
+    count = analytics.rebuild(list(course_ids) or None)
+    db.session.commit()
+    click.echo(f'Resumos recalculados para {count} curso(s).')
+
+# CLI: recalcula as recomendações de todos os cursos (rodar periodicamente, ex.: cron diário)
+@app.cli.command('recommendations-rebuild')
+def recommendations_rebuild():
+    """Recalcula a similaridade entre cursos a partir de todas as compras."""
+    pairs = recommendations.rebuild()
+    db.session.commit()
+    engine = 'NumPy/SciPy' if recommendations.sparse is not None else 'Python puro'
+    click.echo(f'{pairs} pares de cursos processados ({engine}).')
+
+# CLI: renderiza de novo o conteúdo das aulas (rodar após mudar o renderizador de Markdown)
+@app.cli.command('render-lessons')
+@click.option('--processes', type=int, default=None, help='Processos do pool (padrão: número de CPUs)')
+@click.option('--batch-size', type=int, default=200, help='Aulas por tarefa enviada ao pool')
+@click.option('--force', is_flag=True, help='Renderiza todas, mesmo as que estão atualizadas')
+def render_lessons(processes, batch_size, force):
+    """Converte o Markdown das aulas em HTML sanitizado e grava o resultado."""
+    checked, rendered = rendering.rerender(processes, batch_size, force)
+    click.echo(f'{rendered} de {checked} aula(s) renderizada(s).')
+
+# CLI: exporta o catálogo público como HTML estático (as alterações seguintes são
+# regeneradas pela fila de jobs)
+@app.cli.command('freeze')
+@click.option('--course', 'course_ids', type=int, multiple=True, help='Só estes cursos e as listagens (padrão: tudo)')
+def freeze_command(course_ids):
+    """Renderiza /, /cursos e /curso/<id> em FREEZE_DIR para um servidor web estático."""
+    written, removed, copied = freeze.freeze(set(course_ids) or None)
+    click.echo(f"{written} página(s) gravada(s), {removed} removida(s), {copied} arquivo(s) estático(s) "
+               f"copiado(s) em {app.config['FREEZE_DIR']}.")
+
+# CLI: exporta usuários, compras ou mentorias (ex.: flask export compras -f csv --gzip -o compras.csv.gz)
+@app.cli.command('export')
+@click.argument('nome', type=click.Choice(sorted(exports.EXPORTS)))
+@click.option('--format', '-f', 'fmt', type=click.Choice(sorted(exports.FORMATS)), default='csv')
+@click.option('--gzip', 'compress', is_flag=True, help='Comprime a saída com gzip')
+@click.option('--output', '-o', type=click.File('wb'), default='-', help='Arquivo de saída (padrão: stdout)')
+def export_command(nome, fmt, compress, output):
+    """Exporta uma tabela em CSV ou JSON Lines, em streaming."""
+    for chunk in exports.stream(nome, fmt, compress):
+        output.write(chunk)
+
+# CLI: gera dados sintéticos para testes de carga (ex.: flask seed --scale medio)
+@app.cli.command('seed')
+@click.option('--scale', type=click.Choice(list(seed.PRESETS)), default='pequeno', help='Tamanho da base gerada')
+@click.option('--batch-size', type=int, default=5000, help='Linhas por INSERT em massa')
+@click.option('--random-seed', type=int, default=42, help='Semente (mesma semente, mesmos dados)')
+@click.option('--no-rebuild', is_flag=True, help='Não recalcula relatórios e recomendações no final')
+def seed_command(scale, batch_size, random_seed, no_rebuild):
+    """Popula o banco com usuários, cursos, compras, conclusões e mentorias sintéticos."""
+    preset = seed.PRESETS[scale]
+    click.echo(f"Gerando {preset['users']:,} usuários e {preset['courses']:,} cursos "
+               f"(senha de todos: {seed.PASSWORD})...")
+    seed.run(scale, batch_size=batch_size, random_seed=random_seed, rebuild=not no_rebuild, echo=click.echo)
+
+# CLI: gera versões .gz/.br dos arquivos estáticos (rodar no deploy)
+@app.cli.command('compress-static')
+def compress_static():
+    """Pré-comprime os arquivos estáticos de texto."""
+    for path, size, sizes in compression.precompress_static(app.static_folder):
+        details = ', '.join(f'{encoding}: {compressed} B' for encoding, compressed in sizes.items())
+        click.echo(f'{os.path.relpath(path, app.static_folder)}: {size} B -> {details}')
+
+# CLI: mede quantos bytes a compressão economiza em cada página
+@app.cli.command('compression-report')
+@click.option('--path', 'paths', multiple=True, help='Páginas a medir (padrão: páginas públicas e style.css)')
+def compression_report(paths):
+    """Mostra o tamanho de cada página sem compressão, com gzip e com br."""
+    if not paths:
+        paths = ['/', '/cursos', '/login', '/cadastro', f'{app.static_url_path}/style.css']
+        first_course = Course.query.first()
+        if first_course:
+            paths.insert(2, f'/curso/{first_course.id}')
+
+    client = app.test_client()
+    encodings = ['gzip'] + (['br'] if compression.brotli is not None else [])
+    click.echo(f'{"página":<30}{"original":>12}' + ''.join(f'{e:>12}' for e in encodings) + f'{"economia":>12}')
+    for path in paths:
+        raw = client.get(path, headers={'Accept-Encoding': 'identity'}).get_data()
+        sizes = [len(client.get(path, headers={'Accept-Encoding': e}).get_data()) for e in encodings]
+        saved = 100 * (1 - min(sizes) / len(raw)) if raw else 0
+        click.echo(f'{path:<30}{len(raw):>12}' + ''.join(f'{size:>12}' for size in sizes) + f'{saved:>11.0f}%')
+
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()
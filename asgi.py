@@ -0,0 +1,192 @@
+"""Modo ASGI: endpoints de I/O em views async, o resto pelo app Flask.
+
+    uvicorn asgi:application --workers 2
+
+A API do catálogo, o agendamento de mentorias e a conclusão de aulas rodam em
+corrotinas sobre um driver de banco async (aiosqlite localmente), de modo que uma
+escrita lenta não prende uma thread. As demais rotas são repassadas ao app WSGI.
+"""
+import json
+import re
+from datetime import datetime, timedelta
+
+from asgiref.wsgi import WsgiToAsgi
+from itsdangerous import BadSignature
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import analytics
+import metrics
+from app import app, CATALOG_API_COLUMNS
+from mailer import mentoria_agendada
+from models import db, User, Course, Module, Lesson, Purchase, Mentorship, Job, LessonCompletion
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+def async_database_url():
+    if app.config.get('ASYNC_DATABASE_URI'):
+        return app.config['ASYNC_DATABASE_URI']
+    with app.app_context():
+        url = db.engine.url
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+engine = create_async_engine(async_database_url())
+wsgi_app = WsgiToAsgi(app)
+ROUTES = []
+
+
+def route(method, pattern):
+    def decorator(f):
+        ROUTES.append((method, re.compile(f'^{pattern}$'), f))
+        return f
+    return decorator
+
+
+async def send_json(send, data, status=200):
+    body = json.dumps(data, default=str).encode('utf-8')
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def read_json(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    try:
+        return json.loads(b''.join(chunks) or b'{}')
+    except ValueError:
+        return None
+
+
+def current_user_id(scope):
+    """Lê o id do usuário do cookie de sessão assinado do Flask (sem request context)."""
+    cookie_name = app.config['SESSION_COOKIE_NAME'].encode()
+    for name, value in scope['headers']:
+        if name != b'cookie':
+            continue
+        for part in value.split(b';'):
+            key, _, raw = part.strip().partition(b'=')
+            if key != cookie_name:
+                continue
+            serializer = app.session_interface.get_signing_serializer(app)
+            try:
+                data = serializer.loads(raw.decode(),
+                                        max_age=int(app.permanent_session_lifetime.total_seconds()))
+            except BadSignature:
+                return None
+            user_id = data.get('_user_id')
+            return int(user_id) if user_id else None
+    return None
+
+
+@route('GET', r'/api/cursos')
+async def api_cursos(scope, receive, send):
+    async with engine.connect() as conn:
+        rows = await conn.execute(select(*CATALOG_API_COLUMNS).order_by(Course.id))
+        await send_json(send, [row._asdict() for row in rows])
+
+
+@route('POST', r'/api/mentorias')
+async def api_mentorias(scope, receive, send):
+    user_id = current_user_id(scope)
+    if user_id is None:
+        return await send_json(send, {'success': False, 'error': 'Login necessário'}, 401)
+    data = await read_json(receive)
+    if not isinstance(data, dict):
+        return await send_json(send, {'success': False, 'error': 'JSON inválido'}, 400)
+    try:
+        scheduled = datetime.strptime(data.get('date', ''), '%Y-%m-%d %H:%M')
+    except (TypeError, ValueError):
+        return await send_json(send, {'success': False, 'error': 'Data inválida (AAAA-MM-DD HH:MM)'}, 400)
+    # Mesmas regras de MentoringSessionForm.validate_date
+    if scheduled < datetime.now() or scheduled > datetime.now() + timedelta(days=30):
+        return await send_json(send, {'success': False, 'error': 'A data deve estar nos próximos 30 dias.'}, 400)
+    notes = data.get('notes') or ''
+    if not isinstance(notes, str):
+        return await send_json(send, {'success': False, 'error': 'Observações inválidas'}, 400)
+
+    async with engine.begin() as conn:
+        user = (await conn.execute(select(User.username, User.email).where(User.id == user_id))).first()
+        if user is None:
+            return await send_json(send, {'success': False, 'error': 'Login necessário'}, 401)
+        result = await conn.execute(insert(Mentorship).values(
+            user_id=user_id, subject='Mentoria', description=notes, notes=notes,
+            scheduled_date=scheduled, status='pending', created_at=datetime.utcnow(),
+        ))
+        # O email entra na fila na mesma transação, como em jobs.send_email
+        subject, body = mentoria_agendada(user.username, scheduled)
+        now = datetime.utcnow()
+        await conn.execute(insert(Job).values(
+            kind='send_email', payload=json.dumps({'to': user.email, 'subject': subject, 'body': body}),
+            status='pending', attempts=0, max_attempts=app.config['JOBS_MAX_ATTEMPTS'],
+            run_at=now, created_at=now,
+        ))
+    metrics.inc('mentorships_scheduled_total')
+    await send_json(send, {'success': True, 'id': result.inserted_primary_key[0]}, 201)
+
+
+@route('POST', r'/aula/(?P<lesson_id>\d+)/completar')
+async def completar_aula(scope, receive, send, lesson_id):
+    user_id = current_user_id(scope)
+    if user_id is None:
+        return await send_json(send, {'success': False, 'error': 'Login necessário'}, 401)
+    lesson_id = int(lesson_id)
+    try:
+        async with engine.begin() as conn:
+            course_id = (await conn.execute(
+                select(Module.course_id).join(Lesson, Lesson.module_id == Module.id).where(Lesson.id == lesson_id)
+            )).scalar()
+            if course_id is None:
+                return await send_json(send, {'success': False, 'error': 'Aula não encontrada'}, 404)
+            purchased = (await conn.execute(
+                select(Purchase.id).where(Purchase.user_id == user_id, Purchase.course_id == course_id)
+            )).first()
+            if not purchased:
+                return await send_json(send, {'success': False, 'error': 'Curso não comprado'})
+            done = (await conn.execute(select(LessonCompletion.id).where(
+                LessonCompletion.user_id == user_id, LessonCompletion.lesson_id == lesson_id))).first()
+            if not done:
+                await conn.execute(insert(LessonCompletion).values(
+                    user_id=user_id, lesson_id=lesson_id, completed_at=datetime.utcnow()))
+                # INSERT do Core não dispara os eventos do ORM: atualiza o resumo explicitamente
+                await conn.run_sync(analytics.record_completion, user_id, lesson_id)
+        if not done:
+            metrics.inc('lessons_completed_total')
+    except IntegrityError:
+        pass  # outra requisição concluiu a mesma aula ao mesmo tempo
+    await send_json(send, {'success': True})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            metrics.start_flusher()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await engine.dispose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] == 'http':
+        for method, pattern, handler in ROUTES:
+            match = pattern.match(scope['path'])
+            if match and scope['method'] == method:
+                return await handler(scope, receive, send, **match.groupdict())
+    return await wsgi_app(scope, receive, send)
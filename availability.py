@@ -0,0 +1,196 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import event, func, select
+
+import serve
+from models import db, User
+from routing import RoutingSession
+
+# Índice de disponibilidade de usernames e emails (normalizados). Um filtro de Bloom
+# por processo responde "com certeza livre" sem ir ao banco; só os nomes que talvez
+# existam são conferidos pela consulta indexada em lower(username) / lower(email).
+# O filtro é montado na primeira consulta (ou no aquecimento do `flask serve`), recebe
+# os usuários gravados por este processo no commit e, a cada AVAILABILITY_REFRESH_SECONDS,
+# os criados ou alterados por outros workers: User.updated_at maior que o último visto,
+# menos AVAILABILITY_REFRESH_OVERLAP segundos, para não perder commits concorrentes que
+# gravaram um horário anterior. Um filtro de Bloom não pode ter falsos negativos; como
+# garantia extra, ele é refeito do zero a cada AVAILABILITY_REBUILD_SECONDS.
+FIELDS = {'username': User.username, 'email': User.email}
+
+
+def normalize(value):
+    return (value or '').strip().lower()
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(capacity, 1000)
+        self.size = int(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # Double hashing (Kirsch-Mitzenmacher): k posições a partir de dois hashes de 64 bits
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'little')
+        b = int.from_bytes(digest[8:], 'little') | 1
+        return [(a + i * b) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class _Index:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.filters = None
+        self.watermark = None  # maior User.updated_at já lido do banco
+        self.recent = {}       # user_id -> updated_at já adicionados dentro da sobreposição
+        self.refreshed_at = self.built_at = 0.0
+
+    def rebuild(self, session):
+        total = session.execute(select(func.count(User.id))).scalar() or 0
+        error_rate = current_app.config['AVAILABILITY_ERROR_RATE']
+        filters = {field: BloomFilter(total * 2, error_rate) for field in FIELDS}
+        watermark = None
+        rows = session.execute(select(User.username, User.email, User.updated_at).execution_options(yield_per=10000))
+        for username, email, updated_at in rows:
+            filters['username'].add(normalize(username))
+            filters['email'].add(normalize(email))
+            if updated_at is not None and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+        with self.lock:
+            self.filters, self.watermark, self.recent = filters, watermark, {}
+            self.refreshed_at = self.built_at = time.monotonic()
+
+    def add(self, users):
+        # Commits locais entram no filtro, mas não movem a marca d'água: o que outros
+        # workers gravaram nesse meio-tempo ainda precisa ser lido do banco
+        with self.lock:
+            if self.filters is None:
+                return
+            for username, email in users:
+                self.filters['username'].add(normalize(username))
+                self.filters['email'].add(normalize(email))
+
+    def _merge(self, rows, overlap):
+        with self.lock:
+            for user_id, username, email, updated_at in rows:
+                if self.recent.get(user_id) == updated_at:
+                    continue  # já visto numa atualização anterior (a janela se sobrepõe)
+                self.recent[user_id] = updated_at
+                self.filters['username'].add(normalize(username))
+                self.filters['email'].add(normalize(email))
+                if self.watermark is None or updated_at > self.watermark:
+                    self.watermark = updated_at
+            if self.watermark is not None:
+                cutoff = self.watermark - overlap
+                self.recent = {key: value for key, value in self.recent.items() if value >= cutoff}
+
+    def refresh(self, session):
+        if self.filters is None:
+            self.rebuild(session)
+            return
+        config = current_app.config
+        now = time.monotonic()
+        if now - self.refreshed_at < config['AVAILABILITY_REFRESH_SECONDS']:
+            return
+        self.refreshed_at = now
+        if (now - self.built_at >= config['AVAILABILITY_REBUILD_SECONDS']
+                or any(f.count > f.capacity for f in self.filters.values())):
+            self.rebuild(session)  # periódico, ou cheio demais (a taxa de falsos positivos subiria)
+            return
+        overlap = timedelta(seconds=config['AVAILABILITY_REFRESH_OVERLAP'])
+        query = select(User.id, User.username, User.email, User.updated_at)
+        if self.watermark is not None:
+            query = query.where(User.updated_at >= self.watermark - overlap)
+        self._merge(session.execute(query).all(), overlap)
+
+
+_index = _Index()
+
+
+class _RateLimiter:
+    # Janela deslizante por IP, por processo (com N workers o limite efetivo é N vezes maior)
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = {}
+
+    def allow(self, key, limit, window):
+        now = time.monotonic()
+        with self.lock:
+            hits = [t for t in self.hits.get(key, ()) if now - t < window]
+            allowed = len(hits) < limit
+            if allowed:
+                hits.append(now)
+            self.hits[key] = hits
+            if len(self.hits) > 10000:
+                self.hits = {k: v for k, v in self.hits.items() if v and now - v[-1] < window}
+            return allowed
+
+
+_limiter = _RateLimiter()
+
+
+def allow_lookup(ip):
+    """False quando ``ip`` já fez AVAILABILITY_RATE_LIMIT consultas na janela atual."""
+    config = current_app.config
+    return _limiter.allow(ip, config['AVAILABILITY_RATE_LIMIT'], config['AVAILABILITY_RATE_WINDOW'])
+
+
+def rebuild():
+    _index.rebuild(db.session)
+
+
+def is_taken(field, value, exclude_user_id=None):
+    """True se ``value`` (username ou email) já pertence a outro usuário."""
+    value = normalize(value)
+    _index.refresh(db.session)
+    if value not in _index.filters[field]:
+        return False
+    owner = db.session.execute(select(User.id).where(func.lower(FIELDS[field]) == value)).scalar()
+    return owner is not None and owner != exclude_user_id
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect(session, flush_context):
+    users = [obj for obj in list(session.new) + list(session.dirty) if isinstance(obj, User)]
+    if users:
+        session.info.setdefault('availability', []).extend((user.username, user.email) for user in users)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    users = session.info.pop('availability', None)
+    if users:
+        _index.add(users)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _rolled_back(session):
+    session.info.pop('availability', None)
+
+
+@serve.warmup('master')
+def build_availability_index(app):
+    rebuild()
+
+
+def init_app(app):
+    app.config.setdefault('AVAILABILITY_ERROR_RATE', 0.01)
+    app.config.setdefault('AVAILABILITY_REFRESH_SECONDS', 1.0)
+    app.config.setdefault('AVAILABILITY_REFRESH_OVERLAP', 60)
+    app.config.setdefault('AVAILABILITY_REBUILD_SECONDS', 3600)
+    app.config.setdefault('AVAILABILITY_RATE_LIMIT', 30)
+    app.config.setdefault('AVAILABILITY_RATE_WINDOW', 60)
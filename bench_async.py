@@ -0,0 +1,101 @@
+"""Compara a capacidade de conexões simultâneas do modo sync (gunicorn) e async (uvicorn).
+
+    python bench_async.py --concurrency 10 100 500 --duration 5
+
+Sobe cada servidor em uma porta local, dispara ``concurrency`` clientes que fazem
+requisições em sequência durante ``duration`` segundos e mostra requisições/s,
+latências e erros (conexões recusadas ou estouradas).
+"""
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+
+SERVERS = {
+    'sync': lambda port, workers: [sys.executable, '-m', 'gunicorn', '--workers', str(workers),
+                                   '--threads', '4', '--bind', f'127.0.0.1:{port}',
+                                   '--log-level', 'warning', 'app:app'],
+    'async': lambda port, workers: [sys.executable, '-m', 'uvicorn', '--workers', str(workers),
+                                    '--port', str(port), '--log-level', 'warning',
+                                    '--no-access-log', 'asgi:application'],
+}
+
+
+async def fetch(port, path, timeout):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def client(port, path, deadline, timeout, latencies, errors):
+    while time.monotonic() < deadline:
+        start = time.monotonic()
+        try:
+            status = await fetch(port, path, timeout)
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            errors.append(1)
+            continue
+        if status == 200:
+            latencies.append(time.monotonic() - start)
+        else:
+            errors.append(1)
+
+
+async def load(port, path, concurrency, duration, timeout):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(client(port, path, deadline, timeout, latencies, errors)
+                           for _ in range(concurrency)))
+    return latencies, errors
+
+
+def wait_until_ready(port, path, attempts=50):
+    for _ in range(attempts):
+        try:
+            if asyncio.run(fetch(port, path, 1)) == 200:
+                return True
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            time.sleep(0.2)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='/api/cursos')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--timeout', type=float, default=5)
+    parser.add_argument('--port', type=int, default=8300)
+    args = parser.parse_args()
+
+    print(f'{"modo":<8}{"conexões":>10}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}{"erros":>8}')
+    for offset, (mode, command) in enumerate(SERVERS.items()):
+        port = args.port + offset
+        process = subprocess.Popen(command(port, args.workers))
+        try:
+            if not wait_until_ready(port, args.path):
+                print(f'{mode}: servidor não respondeu')
+                continue
+            for concurrency in args.concurrency:
+                latencies, errors = asyncio.run(load(port, args.path, concurrency, args.duration, args.timeout))
+                latencies.sort()
+                p50 = statistics.median(latencies) * 1000 if latencies else 0
+                p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+                print(f'{mode:<8}{concurrency:>10}{len(latencies) / args.duration:>10.0f}'
+                      f'{p50:>10.1f}{p99:>10.1f}{len(errors):>8}')
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
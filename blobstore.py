@@ -0,0 +1,164 @@
+import hashlib
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from models import db, Blob, User, Course
+
+# Imagens enviadas são gravadas por conteúdo: static/uploads/blobs/ab/abcdef...jpg.
+# Arquivos iguais viram um único blob, nomes nunca colidem e a URL é imutável.
+BLOB_DIR = 'blobs'
+CHUNK_SIZE = 64 * 1024
+
+# Colunas que guardam nomes de blobs; o GC considera órfão o que nenhuma delas referencia
+REFERENCES = [
+    (User, 'profile_picture'),
+    (Course, 'image'),
+]
+
+
+def _extension(filename):
+    ext = os.path.splitext(filename or '')[1].lower()
+    return ext if ext[1:].isalnum() else ''
+
+
+def _root():
+    return current_app.config['UPLOAD_FOLDER']
+
+
+def _store_stream(read, ext):
+    folder = os.path.join(_root(), BLOB_DIR)
+    os.makedirs(folder, exist_ok=True)
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            while True:
+                block = read(CHUNK_SIZE)
+                if not block:
+                    break
+                hasher.update(block)
+                tmp.write(block)
+                size += len(block)
+        return _commit_blob(tmp_path, hasher.hexdigest(), ext, size)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _commit_blob(tmp_path, digest, ext, size):
+    # O blob é do conteúdo: reenviar os mesmos bytes com outra extensão devolve o nome já
+    # gravado em Blob.name, nunca um segundo arquivo sem linha.
+    # A linha é tocada antes de olhar o arquivo. Se o GC estiver removendo este blob, ou
+    # ele ainda vê o touched_at novo e devolve o arquivo ao lugar, ou já o tirou de lá
+    # e a cópia recém-enviada é gravada abaixo.
+    touched = db.session.execute(
+        db.update(Blob).where(Blob.hash == digest).values(touched_at=datetime.utcnow())
+    )
+    if touched.rowcount:
+        name = db.session.execute(db.select(Blob.name).where(Blob.hash == digest)).scalar_one()
+    else:
+        name = f'{BLOB_DIR}/{digest[:2]}/{digest}{ext}'
+        db.session.add(Blob(hash=digest, name=name, size=size))
+        db.session.flush()
+    path = os.path.join(_root(), name)
+    try:
+        # mtime novo: a limpeza de arquivos avulsos respeita a carência deste arquivo
+        os.utime(path)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+    return name
+
+
+def store(file_storage):
+    """Grava um FileStorage (campo de formulário) e devolve o nome a guardar no modelo."""
+    return _store_stream(file_storage.stream.read, _extension(file_storage.filename))
+
+
+def store_path(path, filename):
+    """Move um arquivo já em disco (ex.: upload retomável concluído) para o blob store."""
+    with open(path, 'rb') as f:
+        name = _store_stream(f.read, _extension(filename))
+    os.remove(path)
+    return name
+
+
+def referenced_names():
+    queries = [db.session.query(getattr(model, column).label('name'))
+               .filter(getattr(model, column).isnot(None))
+               for model, column in REFERENCES]
+    return queries[0].union(*queries[1:])
+
+
+def _set_aside(path):
+    # Tira o arquivo do lugar antes de decidir: um store() que chegue depois não o
+    # encontra e grava outra cópia, em vez de devolver um nome prestes a sumir
+    aside = path + '.gc'
+    try:
+        os.replace(path, aside)
+    except FileNotFoundError:
+        return None
+    return aside
+
+
+def collect_garbage(grace=timedelta(hours=1), batch_size=500, dry_run=False):
+    """Remove blobs que nenhuma coluna de REFERENCES aponta.
+
+    Blobs mais novos que ``grace`` são preservados: podem ter sido gravados por uma
+    requisição que ainda não fez commit do modelo que os referencia. Cada linha é
+    apagada de novo com as mesmas condições depois de o arquivo sair do lugar; o que
+    um store() concorrente tocou nesse meio-tempo volta para o lugar.
+    """
+    cutoff = datetime.utcnow() - grace
+    live = referenced_names().subquery()
+    orphan = db.and_(Blob.touched_at < cutoff, Blob.name.notin_(db.select(live.c.name)))
+    orphans = db.session.query(Blob.hash, Blob.name, Blob.size).filter(orphan).all()
+    if dry_run:
+        return orphans
+
+    removed = []
+    for start in range(0, len(orphans), batch_size):
+        batch = orphans[start:start + batch_size]
+        hashes = [row.hash for row in batch]
+        aside = {row.hash: _set_aside(os.path.join(_root(), row.name)) for row in batch}
+        db.session.execute(db.delete(Blob).where(Blob.hash.in_(hashes), orphan))
+        db.session.commit()
+        kept = set(db.session.scalars(db.select(Blob.hash).where(Blob.hash.in_(hashes))))
+        for row in batch:
+            if row.hash in kept:
+                if aside[row.hash] is not None:
+                    os.replace(aside[row.hash], os.path.join(_root(), row.name))
+                continue
+            if aside[row.hash] is not None:
+                os.remove(aside[row.hash])
+            removed.append(row)
+    _remove_stray_files(cutoff)
+    return removed
+
+
+def _remove_stray_files(cutoff):
+    # Arquivos sem linha em Blob: temporários de gravações interrompidas, ou blobs
+    # cujo commit nunca aconteceu. Um nome ainda referenciado por algum modelo nunca
+    # é removido, mesmo sem linha.
+    folder = os.path.join(_root(), BLOB_DIR)
+    known = {row.name for row in db.session.query(Blob.name)}
+    known.update(row.name for row in referenced_names())
+    deadline = cutoff.replace(tzinfo=timezone.utc).timestamp()
+    for root, _dirs, files in os.walk(folder):
+        for filename in files:
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, _root()).replace(os.sep, '/')
+            if name in known or os.path.getmtime(path) >= deadline:
+                continue
+            aside = _set_aside(path)
+            if aside is None:
+                continue
+            # store() reaproveitou o arquivo (e renovou o mtime) antes de ele sair do lugar
+            if os.path.getmtime(aside) >= deadline:
+                os.replace(aside, path)
+            else:
+                os.remove(aside)
@@ -0,0 +1,212 @@
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+
+from flask import current_app, url_for
+from sqlalchemy import and_, case, event, func, select
+
+from models import db, Course
+from routing import RoutingSession
+
+# Catálogo em /cursos com filtros (nível, faixa de preço, faixa de duração), ordenação
+# e paginação, sempre sobre colunas indexadas de Course. As contagens de cada faceta
+# vêm de uma única consulta agrupada por (nível, faixa de preço, faixa de duração),
+# guardada em cache por processo: ela é descartada quando este processo grava um
+# curso e, para mudanças feitas por outros workers, vence em CATALOG_FACETS_TTL segundos.
+#
+# Faixas são intervalos (mínimo, máximo]; None deixa o lado aberto.
+PRICE_BUCKETS = (
+    ('ate-100', 'Até R$ 100', None, 100),
+    ('100-200', 'R$ 100 a R$ 200', 100, 200),
+    ('200-300', 'R$ 200 a R$ 300', 200, 300),
+    ('acima-300', 'Acima de R$ 300', 300, None),
+)
+DURATION_BUCKETS = (
+    ('ate-10', 'Até 10 horas', None, 10),
+    ('10-20', '10 a 20 horas', 10, 20),
+    ('20-30', '20 a 30 horas', 20, 30),
+    ('acima-30', 'Mais de 30 horas', 30, None),
+)
+SORTS = {
+    'recentes': ('Mais recentes', (Course.created_at.desc(), Course.id.desc())),
+    'menor-preco': ('Menor preço', (Course.price, Course.id)),
+    'maior-preco': ('Maior preço', (Course.price.desc(), Course.id.desc())),
+    'duracao': ('Mais curtos', (Course.duration, Course.id)),
+    'titulo': ('Título (A-Z)', (Course.title, Course.id)),
+}
+DEFAULT_SORT = 'recentes'
+
+Facet = namedtuple('Facet', 'key label count')
+Page = namedtuple('Page', 'items page per_page total pages has_prev has_next')
+
+
+def level_key(level):
+    """'Intermediário' e 'intermediario' (seed e formulário do admin) são o mesmo nível."""
+    normalized = unicodedata.normalize('NFKD', level or '').encode('ascii', 'ignore').decode('ascii')
+    return normalized.strip().lower()
+
+
+def _bucket_case(column, buckets):
+    whens = [(column <= high, key) for key, _label, _low, high in buckets if high is not None]
+    return case(*whens, else_=buckets[-1][0])
+
+
+def _bucket_filter(column, buckets, key):
+    for bucket_key, _label, low, high in buckets:
+        if bucket_key == key:
+            conditions = []
+            if low is not None:
+                conditions.append(column > low)
+            if high is not None:
+                conditions.append(column <= high)
+            return and_(*conditions)
+
+
+class _FacetCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = None
+        self.loaded_at = 0.0
+
+    def get(self):
+        with self.lock:
+            rows, loaded_at = self.rows, self.loaded_at
+        if rows is not None and time.monotonic() - loaded_at < current_app.config['CATALOG_FACETS_TTL']:
+            return rows
+        price = _bucket_case(Course.price, PRICE_BUCKETS).label('price_bucket')
+        duration = _bucket_case(Course.duration, DURATION_BUCKETS).label('duration_bucket')
+        rows = db.session.execute(
+            select(Course.level, price, duration, func.count())
+            .group_by(Course.level, price, duration)
+        ).all()
+        rows = [(level, level_key(level), price_key, duration_key, count)
+                for level, price_key, duration_key, count in rows]
+        with self.lock:
+            self.rows, self.loaded_at = rows, time.monotonic()
+        return rows
+
+    def clear(self):
+        with self.lock:
+            self.rows = None
+
+
+_facets = _FacetCache()
+
+
+def clear_cache():
+    """Descarta as contagens de facetas deste processo (lidas de novo na próxima consulta)."""
+    _facets.clear()
+
+
+def parse_args(args):
+    """Filtros válidos de ``args`` (query string); valores desconhecidos são ignorados."""
+    filters = {}
+    if args.get('nivel'):
+        filters['nivel'] = level_key(args['nivel'])
+    if args.get('preco') in {key for key, *_ in PRICE_BUCKETS}:
+        filters['preco'] = args['preco']
+    if args.get('duracao') in {key for key, *_ in DURATION_BUCKETS}:
+        filters['duracao'] = args['duracao']
+    sort = args.get('ordem')
+    return filters, sort if sort in SORTS else DEFAULT_SORT
+
+
+def url(filters, sort, **changes):
+    """URL de /cursos com ``filters`` e ``sort`` alterados por ``changes`` (None remove o parâmetro).
+
+    Mudar filtro ou ordenação volta para a primeira página.
+    """
+    args = dict(filters, ordem=sort)
+    args.update(changes)
+    if args.get('ordem') == DEFAULT_SORT:
+        args['ordem'] = None
+    if args.get('pagina') == 1:
+        args['pagina'] = None
+    return url_for('cursos', **{name: value for name, value in args.items() if value is not None})
+
+
+def _matches(row, filters, skip=None):
+    _level, level, price, duration, _count = row
+    values = {'nivel': level, 'preco': price, 'duracao': duration}
+    return all(values[name] == value for name, value in filters.items() if name != skip)
+
+
+def facets(filters):
+    """Contagens por nível, faixa de preço e faixa de duração.
+
+    Cada faceta é contada com os demais filtros aplicados, mas não com o seu próprio,
+    para mostrar quantos cursos cada opção traria. Retorna (facetas, total filtrado).
+    """
+    rows = _facets.get()
+    levels, prices, durations = {}, {}, {}
+    labels = {}
+    for row in rows:
+        level_raw, level, price, duration, count = row
+        labels.setdefault(level, level_raw)
+        if _matches(row, filters, skip='nivel'):
+            levels[level] = levels.get(level, 0) + count
+        if _matches(row, filters, skip='preco'):
+            prices[price] = prices.get(price, 0) + count
+        if _matches(row, filters, skip='duracao'):
+            durations[duration] = durations.get(duration, 0) + count
+    total = sum(row[-1] for row in rows if _matches(row, filters))
+    return {
+        'nivel': [Facet(key, labels[key], count) for key, count in sorted(levels.items())],
+        'preco': [Facet(key, label, prices.get(key, 0)) for key, label, *_ in PRICE_BUCKETS],
+        'duracao': [Facet(key, label, durations.get(key, 0)) for key, label, *_ in DURATION_BUCKETS],
+    }, total
+
+
+def _level_values(key):
+    # Grafias gravadas para o nível: o filtro vira um IN sobre o índice de level
+    return sorted({level for level, normalized, *_ in _facets.get() if normalized == key}) or [key]
+
+
+def search(filters, sort=DEFAULT_SORT, page=1, per_page=None, total=None, options=()):
+    """Uma página de cursos filtrados e ordenados (LIMIT/OFFSET sobre os índices de Course).
+
+    ``total`` (das facetas) só serve para numerar as páginas; se estiver defasado, a
+    existência da próxima página ainda é exata, pois busca-se um curso a mais.
+    """
+    per_page = per_page or current_app.config['CATALOG_PER_PAGE']
+    page = max(page, 1)
+    query = select(Course).options(*options)
+    if 'nivel' in filters:
+        query = query.where(Course.level.in_(_level_values(filters['nivel'])))
+    if 'preco' in filters:
+        query = query.where(_bucket_filter(Course.price, PRICE_BUCKETS, filters['preco']))
+    if 'duracao' in filters:
+        query = query.where(_bucket_filter(Course.duration, DURATION_BUCKETS, filters['duracao']))
+    items = db.session.scalars(
+        query.order_by(*SORTS[sort][1]).limit(per_page + 1).offset((page - 1) * per_page)
+    ).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    if total is None:
+        total = (page - 1) * per_page + len(items) + (1 if has_next else 0)
+    pages = max(-(-total // per_page), page if items else 1, page + 1 if has_next else 0)
+    return Page(items, page, per_page, total, pages, page > 1, has_next)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect(session, flush_context):
+    if any(isinstance(obj, Course) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info['catalog_changed'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    if session.info.pop('catalog_changed', False):
+        _facets.clear()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _rolled_back(session):
+    session.info.pop('catalog_changed', None)
+
+
+def init_app(app):
+    app.config.setdefault('CATALOG_PER_PAGE', 24)
+    app.config.setdefault('CATALOG_FACETS_TTL', 60)
+    app.add_template_global(url, 'catalog_url')
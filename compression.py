@@ -0,0 +1,126 @@
+import gzip
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # br é opcional: sem o pacote, só gzip é oferecido
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/csv', 'text/calendar',
+    'application/javascript', 'text/javascript', 'application/json',
+    'application/xml', 'image/svg+xml',
+}
+STATIC_EXTENSIONS = {'.css', '.js', '.svg', '.html', '.txt', '.json', '.xml'}
+
+
+def accepted_encodings():
+    accept = request.accept_encodings
+    encodings = []
+    if brotli is not None and accept['br']:
+        encodings.append('br')
+    if accept['gzip']:
+        encodings.append('gzip')
+    return encodings
+
+
+def compress(data, encoding, level=None):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level if level is not None else 5)
+    return gzip.compress(data, compresslevel=level if level is not None else 6, mtime=0)
+
+
+def _compress_response(response, config):
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < config['COMPRESS_MIN_SIZE']:
+        return response
+
+    encodings = accepted_encodings()
+    if not encodings:
+        return response
+    encoding = encodings[0]
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def _static_view(app):
+    original = app.view_functions['static']
+
+    def static(filename):
+        # Serve o irmão .br/.gz gerado por `flask compress-static`, se existir e estiver atualizado
+        source = safe_join(app.static_folder, filename)
+        for encoding in (accepted_encodings() if source else []):
+            suffix = '.br' if encoding == 'br' else '.gz'
+            candidate = source + suffix
+            try:
+                if os.path.getmtime(candidate) < os.path.getmtime(source):
+                    continue
+            except OSError:
+                continue
+            try:
+                response = send_from_directory(app.static_folder, filename + suffix,
+                                               mimetype=_guess_type(filename))
+            except NotFound:
+                continue
+            response.headers.pop('Content-Disposition', None)
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            return response
+        response = original(filename=filename)
+        if os.path.splitext(filename)[1] in STATIC_EXTENSIONS:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    return static
+
+
+def _guess_type(filename):
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+
+def precompress_static(folder, level=9):
+    """Gera irmãos .gz (e .br, se disponível) para os arquivos estáticos de texto.
+
+    Só reescreve arquivos ausentes ou mais antigos que o original. Retorna a
+    lista de (caminho, tamanho original, {encoding: tamanho}).
+    """
+    written = []
+    for root, _dirs, files in os.walk(folder):
+        for name in files:
+            if os.path.splitext(name)[1] not in STATIC_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            sizes = {}
+            encodings = ['gzip'] + (['br'] if brotli is not None else [])
+            for encoding in encodings:
+                target = path + ('.br' if encoding == 'br' else '.gz')
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    sizes[encoding] = os.path.getsize(target)
+                    continue
+                compressed = compress(data, encoding, 11 if encoding == 'br' else level)
+                with open(target, 'wb') as f:
+                    f.write(compressed)
+                sizes[encoding] = len(compressed)
+            written.append((path, len(data), sizes))
+    return written
+
+
+def init_app(app):
+    app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+    app.after_request(lambda response: _compress_response(response, app.config))
+    app.view_functions['static'] = _static_view(app)
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from models import db, User, Course, Purchase, Mentorship
+
+# Exportações para o financeiro. As linhas vêm do banco em lotes (yield_per, cursor
+# no servidor quando o driver suporta) e são codificadas e comprimidas aos poucos:
+# a memória fica constante e o primeiro pedaço sai antes da consulta terminar.
+EXPORTS = {
+    'usuarios': lambda: select(
+        User.id, User.username, User.email, User.is_admin, User.created_at,
+    ).order_by(User.id),
+    'compras': lambda: select(
+        Purchase.id, Purchase.user_id, User.email, Purchase.course_id, Course.title.label('course_title'),
+        Course.price, Purchase.status, Purchase.purchase_date,
+    ).join(User, Purchase.user_id == User.id).join(Course, Purchase.course_id == Course.id).order_by(Purchase.id),
+    'mentorias': lambda: select(
+        Mentorship.id, Mentorship.user_id, User.email, Mentorship.subject, Mentorship.status,
+        Mentorship.scheduled_date, Mentorship.created_at,
+    ).join(User, Mentorship.user_id == User.id).order_by(Mentorship.id),
+}
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def rows(name):
+    result = db.session.execute(EXPORTS[name](), execution_options={'yield_per': BATCH_SIZE})
+    return result.keys(), result
+
+
+def encode_csv(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_plain(value) for value in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def encode_jsonl(columns, rows):
+    columns = list(columns)
+    parts, size = [], 0
+    for row in rows:
+        line = json.dumps({c: _plain(v) for c, v in zip(columns, row)}, ensure_ascii=False) + '\n'
+        parts.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(parts).encode('utf-8')
+            parts, size = [], 0
+    yield ''.join(parts).encode('utf-8')
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(name, fmt, compress=False):
+    """Gera os bytes da exportação ``name`` no formato ``fmt`` ('csv' ou 'jsonl')."""
+    columns, result = rows(name)
+    encode = encode_csv if fmt == 'csv' else encode_jsonl
+    chunks = encode(columns, result)
+    if compress:
+        chunks = gzip_chunks(chunks)
+    try:
+        for chunk in chunks:
+            if chunk:
+                yield chunk
+    finally:
+        result.close()
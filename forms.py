@@ -17,6 +17,16 @@ class RegistrationForm(FlaskForm):
     confirm_password = PasswordField('Confirmar Senha', validators=[DataRequired(), EqualTo('password')])
     submit = SubmitField('Cadastrar')
 
+    def validate_username(self, username):
+        import availability
+        if availability.is_taken('username', username.data):
+            raise ValidationError('Este nome de usuário já está em uso.')
+
+    def validate_email(self, email):
+        import availability
+        if availability.is_taken('email', email.data):
+            raise ValidationError('Este email já está em uso.')
+
 class ProfileForm(FlaskForm):
     username = StringField('Nome de Usuário', validators=[DataRequired(), Length(min=3, max=80)])
     email = StringField('Email', validators=[DataRequired(), Email()])
@@ -28,6 +38,18 @@ class ProfileForm(FlaskForm):
     confirm_password = PasswordField('Confirmar Nova Senha', validators=[EqualTo('password')])
     submit = SubmitField('Atualizar Perfil')
 
+    def validate_username(self, username):
+        import availability
+        from flask_login import current_user
+        if availability.is_taken('username', username.data, exclude_user_id=current_user.id):
+            raise ValidationError('Este nome de usuário já está em uso.')
+
+    def validate_email(self, email):
+        import availability
+        from flask_login import current_user
+        if availability.is_taken('email', email.data, exclude_user_id=current_user.id):
+            raise ValidationError('Este email já está em uso.')
+
 class CourseForm(FlaskForm):
     title = StringField('Título', validators=[DataRequired(), Length(max=100)])
     description = TextAreaField('Descrição', validators=[DataRequired()])
@@ -53,6 +75,7 @@ class LessonForm(FlaskForm):
     title = StringField('Título', validators=[DataRequired(), Length(max=100)])
     content = TextAreaField('Conteúdo', validators=[DataRequired()])
     video_url = StringField('URL do Vídeo', validators=[Optional()])
+    duration = IntegerField('Duração', validators=[Optional(), NumberRange(min=1)])
     submit = SubmitField('Salvar Aula')
 
 class MentorshipForm(FlaskForm):
@@ -77,18 +100,25 @@ class EditarPerfilForm(FlaskForm):
         self.original_email = original_email
 
     def validate_username(self, username):
-        if username.data != self.original_username:
-            from models import User
-            user = User.query.filter_by(username=username.data).first()
-            if user:
-                raise ValidationError('Este nome de usuário já está em uso.')
+        import availability
+        if (availability.normalize(username.data) != availability.normalize(self.original_username)
+                and availability.is_taken('username', username.data)):
+            raise ValidationError('Este nome de usuário já está em uso.')
 
     def validate_email(self, email):
-        if email.data != self.original_email:
-            from models import User
-            user = User.query.filter_by(email=email.data).first()
-            if user:
-                raise ValidationError('Este email já está em uso.')
+        import availability
+        if (availability.normalize(email.data) != availability.normalize(self.original_email)
+                and availability.is_taken('email', email.data)):
+            raise ValidationError('Este email já está em uso.')
+
+class RedefinirSenhaForm(FlaskForm):
+    nova_senha = PasswordField('Nova Senha', validators=[
+        DataRequired(),
+        Length(min=6),
+        EqualTo('confirmar_senha', message='As senhas devem ser iguais')
+    ])
+    confirmar_senha = PasswordField('Confirmar Nova Senha', validators=[DataRequired()])
+    submit = SubmitField('Redefinir Senha')
 
 class AlterarSenhaForm(FlaskForm):
     senha_atual = PasswordField('Senha Atual', validators=[DataRequired()])
@@ -101,8 +131,9 @@ class AlterarSenhaForm(FlaskForm):
     submit = SubmitField('Alterar Senha')
 
 class MentoringSessionForm(FlaskForm):
-    date = DateTimeField('Data e Hora', validators=[DataRequired()], format='%Y-%m-%d %H:%M')
-    duration = SelectField('Duração', choices=[
+    # O input datetime-local envia "2026-10-20T14:00"
+    date = DateTimeField('Data e Hora', validators=[DataRequired()], format=['%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M'])
+    duration = SelectField('Duração', coerce=int, choices=[
         (30, '30 minutos'),
         (60, '1 hora'),
         (90, '1 hora e 30 minutos'),
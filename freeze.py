@@ -0,0 +1,159 @@
+import os
+import shutil
+
+from flask import current_app
+from sqlalchemy import event, inspect, select
+
+import catalog
+import compression
+import routing
+from jobs import enqueue, handler
+from models import db, Course, Module, Lesson, Purchase
+from routing import RoutingSession
+
+# Exportação estática do catálogo público (`flask freeze`): /, /cursos e /curso/<id>
+# renderizados como visitante anônimo em FREEZE_DIR/<url>/index.html (com .gz/.br ao
+# lado) e uma cópia de static/. Um servidor web comum serve esses arquivos para quem
+# não tem cookie de sessão; só usuários logados chegam aos workers do Python.
+#
+# Depois da primeira exportação, cada alteração de curso, módulo, aula ou compra (a
+# página do curso mostra o número de alunos) agenda (fila de jobs) a regeneração apenas
+# das listagens e das páginas dos cursos afetados; os jobs pendentes são agrupados.
+LISTING_URLS = ('/', '/cursos')
+
+
+def enabled():
+    return os.path.exists(os.path.join(current_app.config['FREEZE_DIR'], 'index.html'))
+
+
+def schedule(course_ids):
+    """Agenda a regeneração das páginas de ``course_ids`` (gravado com o commit do chamador)."""
+    course_ids = sorted({course_id for course_id in course_ids if course_id is not None})
+    if course_ids and enabled():
+        return enqueue('freeze_pages', {'course_ids': course_ids})
+
+
+def _course_url(course_id):
+    return current_app.url_map.bind('localhost').build('curso_detail', {'course_id': course_id})
+
+
+def _page_path(root, url):
+    return os.path.join(root, url.strip('/'), 'index.html')
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    encodings = ['gzip'] + (['br'] if compression.brotli is not None else [])
+    versions = [(path, data)] + [(path + ('.br' if encoding == 'br' else '.gz'), compression.compress(data, encoding, 9))
+                                 for encoding in encodings]
+    # Escreve num temporário e renomeia: o servidor web nunca lê uma página pela metade
+    for target, content in versions:
+        with open(target + '.tmp', 'wb') as f:
+            f.write(content)
+        os.replace(target + '.tmp', target)
+
+
+def sync_static(root):
+    """Copia para ``root``/static os arquivos estáticos novos ou alterados. Retorna quantos copiou."""
+    source = current_app.static_folder
+    target_root = os.path.join(root, current_app.static_url_path.strip('/'))
+    copied = 0
+    for directory, _dirs, files in os.walk(source):
+        target_dir = os.path.join(target_root, os.path.relpath(directory, source))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in files:
+            src, dst = os.path.join(directory, name), os.path.join(target_dir, name)
+            stat = os.stat(src)
+            if os.path.exists(dst):
+                existing = os.stat(dst)
+                if existing.st_size == stat.st_size and existing.st_mtime >= stat.st_mtime:
+                    continue
+            shutil.copy2(src, dst)
+            copied += 1
+    return copied
+
+
+def freeze(course_ids=None):
+    """Renderiza as páginas públicas em FREEZE_DIR. Retorna (páginas gravadas, removidas, arquivos estáticos).
+
+    Sem ``course_ids`` exporta o catálogo inteiro e apaga páginas de cursos que não
+    existem mais; com ``course_ids``, só as listagens e as páginas desses cursos.
+    """
+    root = current_app.config['FREEZE_DIR']
+    if course_ids is None:
+        course_ids = db.session.scalars(select(Course.id)).all()
+        existing = os.path.join(root, 'curso')
+        stale = set(os.listdir(existing)) - {str(course_id) for course_id in course_ids} if os.path.isdir(existing) else set()
+        urls_to_remove = [_course_url(int(name)) for name in stale if name.isdigit()]
+    else:
+        urls_to_remove = []
+    client = current_app.test_client()  # sem cookies: a página que um visitante anônimo vê
+    # O job roda logo após o commit que o agendou: lê do primário (uma réplica ainda não
+    # teria a alteração) e recalcula as facetas, que senão iriam defasadas para o arquivo
+    catalog.clear_cache()
+    written = 0
+    for url in list(LISTING_URLS) + [_course_url(course_id) for course_id in sorted(course_ids)]:
+        response = client.get(url, environ_overrides={routing.PRIMARY_ENVIRON_KEY: True})
+        if response.status_code == 200:
+            _write(_page_path(root, url), response.get_data())
+            written += 1
+        elif response.status_code == 404:
+            urls_to_remove.append(url)
+        else:
+            raise RuntimeError(f'{url} respondeu {response.status_code}')
+    for url in urls_to_remove:
+        shutil.rmtree(os.path.dirname(_page_path(root, url)), ignore_errors=True)
+    return written, len(urls_to_remove), sync_static(root)
+
+
+@event.listens_for(Module.course_id, 'set', active_history=True)
+@event.listens_for(Lesson.module_id, 'set', active_history=True)
+@event.listens_for(Purchase.course_id, 'set', active_history=True)
+def _load_previous(target, value, oldvalue, initiator):
+    # active_history: carrega o valor anterior mesmo se ainda não lido, para _collect
+    # saber de qual curso um módulo (ou aula) saiu
+    pass
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect(session, flush_context):
+    if not enabled():
+        return
+    course_ids = session.info.setdefault('freeze_courses', set())
+    module_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        # Ao mover um módulo (ou aula), o curso de origem também muda: o histórico do
+        # atributo ainda guarda o valor anterior neste ponto do flush
+        if isinstance(obj, Course):
+            course_ids.add(obj.id)
+        elif isinstance(obj, (Module, Purchase)):
+            course_ids.add(obj.course_id)
+            course_ids.update(inspect(obj).attrs.course_id.history.deleted)
+        elif isinstance(obj, Lesson):
+            module_ids.add(obj.module_id)
+            module_ids.update(inspect(obj).attrs.module_id.history.deleted)
+    if module_ids:
+        course_ids.update(session.connection().execute(
+            select(Module.course_id).where(Module.id.in_(module_ids))
+        ).scalars())
+
+
+@event.listens_for(RoutingSession, 'after_flush_postexec')
+def _schedule_collected(session, flush_context):
+    # O job entra no próximo flush do mesmo commit
+    course_ids = session.info.pop('freeze_courses', None)
+    if course_ids:
+        schedule(course_ids)
+
+
+@handler('freeze_pages')
+def _freeze_batch(payloads):
+    course_ids = set()
+    for payload in payloads:
+        course_ids.update(payload['course_ids'])
+    freeze(course_ids)
+    return [None] * len(payloads)
+
+
+def init_app(app):
+    app.config.setdefault('FREEZE_DIR', os.path.join(app.instance_path, 'freeze'))
@@ -0,0 +1,169 @@
+import json
+import multiprocessing
+import random
+import signal
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from mailer import SMTPPool, build_message
+from models import db, Job
+
+# kind -> função que recebe uma lista de payloads e devolve uma lista paralela
+# com None (sucesso) ou a mensagem de erro de cada item
+HANDLERS = {}
+
+
+def handler(kind):
+    def decorator(f):
+        HANDLERS[kind] = f
+        return f
+    return decorator
+
+
+def enqueue(kind, payload, run_at=None, max_attempts=None):
+    """Adiciona um job à sessão atual; ele é gravado junto com o commit do chamador."""
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        run_at=run_at or datetime.utcnow(),
+        max_attempts=max_attempts or current_app.config['JOBS_MAX_ATTEMPTS'],
+    )
+    db.session.add(job)
+    return job
+
+
+def send_email(to, subject, body):
+    return enqueue('send_email', {'to': to, 'subject': subject, 'body': body})
+
+
+def retry_delay(attempts):
+    base = current_app.config['JOBS_RETRY_BASE']
+    delay = min(base * 2 ** (attempts - 1), current_app.config['JOBS_RETRY_MAX'])
+    # Jitter para que falhas em massa não voltem todas no mesmo instante
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def claim(batch_size):
+    """Reserva até ``batch_size`` jobs prontos para este worker.
+
+    A reserva é um UPDATE condicional por id, então dois workers nunca pegam o
+    mesmo job. Jobs presos em 'running' além de JOBS_LOCK_TIMEOUT (worker que
+    morreu) voltam a ser elegíveis.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config['JOBS_LOCK_TIMEOUT'])
+    ready = or_(
+        and_(Job.status == 'pending', Job.run_at <= now),
+        and_(Job.status == 'running', Job.locked_at < stale),
+    )
+    candidates = [row.id for row in db.session.query(Job.id).filter(ready)
+                  .order_by(Job.run_at).limit(batch_size)]
+    claimed = []
+    for job_id in candidates:
+        updated = Job.query.filter(Job.id == job_id, ready).update(
+            {'status': 'running', 'locked_at': now, 'attempts': Job.attempts + 1},
+            synchronize_session=False,
+        )
+        if updated:
+            claimed.append(job_id)
+    db.session.commit()
+    if not claimed:
+        return []
+    return Job.query.filter(Job.id.in_(claimed)).order_by(Job.run_at).all()
+
+
+def _finish(job, error):
+    job.locked_at = None
+    job.last_error = error
+    if error is None:
+        job.status = 'done'
+    elif job.attempts >= job.max_attempts:
+        job.status = 'failed'
+    else:
+        job.status = 'pending'
+        job.run_at = datetime.utcnow() + retry_delay(job.attempts)
+
+
+def run_batch(batch_size=20):
+    """Executa um lote de jobs, agrupando por tipo. Retorna quantos foram processados."""
+    jobs = claim(batch_size)
+    by_kind = {}
+    for job in jobs:
+        by_kind.setdefault(job.kind, []).append(job)
+
+    for kind, group in by_kind.items():
+        fn = HANDLERS.get(kind)
+        if fn is None:
+            errors = [f'Tipo de job desconhecido: {kind}'] * len(group)
+        else:
+            try:
+                errors = fn([json.loads(job.payload) for job in group])
+            except Exception as exc:
+                errors = [repr(exc)] * len(group)
+        for job, error in zip(group, errors):
+            _finish(job, error)
+
+    db.session.commit()
+    return len(jobs)
+
+
+_smtp_pool = None
+
+
+@handler('send_email')
+def _send_email_batch(payloads):
+    global _smtp_pool
+    if _smtp_pool is None:
+        _smtp_pool = SMTPPool.from_config(current_app.config)
+    messages = [build_message(p['to'], p['subject'], p['body']) for p in payloads]
+    return _smtp_pool.send_batch(messages)
+
+
+def work(batch_size=20, poll_interval=1.0):
+    """Loop de um worker. Deve rodar dentro de um app context."""
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    # Conexões herdadas do processo pai (fork) não podem ser compartilhadas
+    db.engine.dispose(close=False)
+    try:
+        while not stopping:
+            if not run_batch(batch_size):
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if _smtp_pool is not None:
+            _smtp_pool.close()
+
+
+def _worker_main(batch_size, poll_interval):
+    from app import app
+    with app.app_context():
+        work(batch_size, poll_interval)
+
+
+def run_workers(processes, batch_size=20, poll_interval=1.0):
+    """Inicia ``processes`` workers e espera até receber Ctrl+C ou SIGTERM."""
+    if processes <= 1:
+        work(batch_size, poll_interval)
+        return
+
+    workers = [
+        multiprocessing.Process(target=_worker_main, args=(batch_size, poll_interval), daemon=True)
+        for _ in range(processes)
+    ]
+    for process in workers:
+        process.start()
+
+    signal.signal(signal.SIGTERM, lambda *args: [p.terminate() for p in workers])
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            process.join()
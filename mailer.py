@@ -0,0 +1,111 @@
+import smtplib
+import time
+from email.message import EmailMessage
+
+from flask import current_app
+
+
+class SMTPPool:
+    """Mantém uma conexão SMTP aberta entre lotes de envio.
+
+    Abrir uma conexão (e o handshake TLS/login) custa mais que enviar a
+    mensagem, então o worker reaproveita a mesma conexão enquanto ela estiver
+    viva e a fecha depois de ``idle_timeout`` segundos sem uso.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=False,
+                 timeout=10, idle_timeout=60):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._conn = None
+        self._last_used = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            host=config['MAIL_SERVER'],
+            port=config['MAIL_PORT'],
+            username=config.get('MAIL_USERNAME'),
+            password=config.get('MAIL_PASSWORD'),
+            use_tls=config.get('MAIL_USE_TLS', False),
+            idle_timeout=config.get('MAIL_IDLE_TIMEOUT', 60),
+        )
+
+    def _connect(self):
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password)
+        return conn
+
+    def connection(self):
+        expired = time.monotonic() - self._last_used > self.idle_timeout
+        if self._conn is not None and expired:
+            self.close()
+        if self._conn is None:
+            self._conn = self._connect()
+        else:
+            try:
+                self._conn.noop()
+            except smtplib.SMTPException:
+                self.close()
+                self._conn = self._connect()
+        self._last_used = time.monotonic()
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._conn = None
+
+    def send_batch(self, messages):
+        """Envia várias mensagens pela mesma conexão.
+
+        Retorna uma lista paralela a ``messages`` com ``None`` para cada envio
+        bem-sucedido ou a mensagem de erro correspondente.
+        """
+        results = []
+        conn = None
+        for message in messages:
+            try:
+                if conn is None:
+                    conn = self.connection()
+                conn.send_message(message)
+                results.append(None)
+            except smtplib.SMTPServerDisconnected as exc:
+                # A conexão caiu no meio do lote: reabre na próxima mensagem
+                self._conn = None
+                conn = None
+                results.append(str(exc))
+            except (smtplib.SMTPException, OSError) as exc:
+                results.append(str(exc))
+        self._last_used = time.monotonic()
+        return results
+
+
+def mentoria_agendada(username, scheduled_date):
+    """Assunto e corpo do email enviado quando um aluno agenda uma mentoria."""
+    return (
+        'Mentoria agendada',
+        f'Olá, {username}!\n\n'
+        f'Recebemos seu pedido de mentoria para {scheduled_date.strftime("%d/%m/%Y às %H:%M")}.\n'
+        'Você será avisado quando ela for confirmada.'
+    )
+
+
+def build_message(to, subject, body, sender=None):
+    message = EmailMessage()
+    message['From'] = sender or current_app.config['MAIL_DEFAULT_SENDER']
+    message['To'] = to
+    message['Subject'] = subject
+    message.set_content(body)
+    return message
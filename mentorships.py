@@ -0,0 +1,176 @@
+import hashlib
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+
+from models import db, User, Mentorship
+
+# Calendário de mentorias (semana ou mês) e feeds iCalendar. Tudo é lido por faixa
+# de scheduled_date, sobre os índices (scheduled_date) e (user_id, scheduled_date):
+# a página e o feed não crescem com o histórico.
+#
+# O feed cobre MENTORSHIP_FEED_PAST_DAYS para trás e MENTORSHIP_FEED_FUTURE_DAYS para
+# frente, sai em pedaços direto do cursor e tem um ETag calculado por uma consulta
+# agregada na mesma faixa; um cliente que consulta de hora em hora recebe 304 enquanto
+# nada mudou. Não há Last-Modified: o maior updated_at não muda quando uma mentoria é
+# excluída, e If-Modified-Since responderia 304 com o feed desatualizado. As datas
+# agendadas não têm fuso (hora local de quem agendou) e vão para o feed como horário
+# "flutuante".
+VIEWS = {'semana': 'Semana', 'mes': 'Mês'}
+ICS_STATUS = {'pending': 'TENTATIVE', 'approved': 'CONFIRMED', 'rejected': 'CANCELLED'}
+CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 500
+
+Period = namedtuple('Period', 'view anchor start end previous next')
+
+
+def period(view, anchor):
+    """Dias exibidos na ``view`` que contém ``anchor`` (semanas de segunda a domingo)."""
+    if view == 'semana':
+        start = anchor - timedelta(days=anchor.weekday())
+        end = start + timedelta(days=7)
+        return Period(view, anchor, start, end, start - timedelta(days=7), end)
+    first = anchor.replace(day=1)
+    next_month = (first + timedelta(days=32)).replace(day=1)
+    start = first - timedelta(days=first.weekday())
+    end = next_month + timedelta(days=(7 - next_month.weekday()) % 7)
+    return Period(view, anchor, start, end, (first - timedelta(days=1)).replace(day=1), next_month)
+
+
+def parse_period(args):
+    view = args.get('visao') if args.get('visao') in VIEWS else 'mes'
+    try:
+        anchor = date.fromisoformat(args.get('data', ''))
+    except ValueError:
+        anchor = date.today()
+    return period(view, anchor)
+
+
+def between(start, end, user_id=None):
+    """Mentorias com scheduled_date em [start, end), em ordem de horário."""
+    query = (
+        select(Mentorship)
+        .where(Mentorship.scheduled_date >= datetime.combine(start, time.min),
+               Mentorship.scheduled_date < datetime.combine(end, time.min))
+        .order_by(Mentorship.scheduled_date, Mentorship.id)
+    )
+    if user_id is None:
+        query = query.options(joinedload(Mentorship.user))
+    else:
+        query = query.where(Mentorship.user_id == user_id)
+    return db.session.scalars(query).all()
+
+
+def weeks(current, sessions):
+    """Grade do período: lista de semanas, cada uma com (dia, mentorias do dia)."""
+    by_day = {}
+    for session in sessions:
+        by_day.setdefault(session.scheduled_date.date(), []).append(session)
+    days = [current.start + timedelta(days=n) for n in range((current.end - current.start).days)]
+    return [[(day, by_day.get(day, [])) for day in days[i:i + 7]] for i in range(0, len(days), 7)]
+
+
+def feed_window():
+    # Alinhada ao dia: o conteúdo (e o ETag) só muda quando alguma mentoria muda
+    today = datetime.combine(date.today(), time.min)
+    config = current_app.config
+    return (today - timedelta(days=config['MENTORSHIP_FEED_PAST_DAYS']),
+            today + timedelta(days=config['MENTORSHIP_FEED_FUTURE_DAYS']))
+
+
+def _in_window(query, user_id):
+    start, end = feed_window()
+    query = query.where(Mentorship.scheduled_date >= start, Mentorship.scheduled_date < end)
+    if user_id is not None:
+        query = query.where(Mentorship.user_id == user_id)
+    return query
+
+
+def etag(user_id=None):
+    """ETag do feed; a contagem e o maior id pegam também exclusões e inserções."""
+    updated = func.coalesce(Mentorship.updated_at, Mentorship.created_at)
+    count, last_modified, last_id = db.session.execute(
+        _in_window(select(func.count(), func.max(updated), func.max(Mentorship.id)), user_id)
+    ).one()
+    start, _end = feed_window()
+    key = f'{user_id or "admin"}:{start:%Y%m%d}:{count}:{last_modified}:{last_id}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _escape(text):
+    return (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,') \
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def _fold(line):
+    # RFC 5545: linhas de no máximo 75 octetos; as continuações começam com um espaço
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, current, size, limit = [], [], 0, 75
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > limit:
+            parts.append(''.join(current))
+            current, size, limit = [], 0, 74
+        current.append(char)
+        size += width
+    parts.append(''.join(current))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _event(row, domain, admin):
+    start = row.scheduled_date
+    summary = f'{row.subject} - {row.username}' if admin else row.subject
+    stamp = row.updated_at or row.created_at or start
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:mentoria-{row.id}@{domain}',
+        f'DTSTAMP:{stamp:%Y%m%dT%H%M%S}Z',
+        f'LAST-MODIFIED:{stamp:%Y%m%dT%H%M%S}Z',
+        f'DTSTART:{start:%Y%m%dT%H%M%S}',
+        f'DTEND:{start + timedelta(minutes=row.duration or 60):%Y%m%dT%H%M%S}',
+        f'SUMMARY:{_escape(summary)}',
+        f'DESCRIPTION:{_escape(row.notes or row.description)}',
+        f'STATUS:{ICS_STATUS.get(row.status, "TENTATIVE")}',
+        'END:VEVENT',
+    ]
+    return ''.join(_fold(line) for line in lines)
+
+
+def stream_ics(user_id=None, name='Mentorias', domain='localhost'):
+    """Gera o feed .ics em pedaços (sem ``user_id``: todas as mentorias, para o admin)."""
+    query = _in_window(
+        select(Mentorship.id, Mentorship.subject, Mentorship.description, Mentorship.notes,
+               Mentorship.status, Mentorship.scheduled_date, Mentorship.duration,
+               Mentorship.created_at, Mentorship.updated_at, User.username)
+        .join(User, Mentorship.user_id == User.id)
+        .order_by(Mentorship.scheduled_date, Mentorship.id),
+        user_id,
+    )
+    result = db.session.execute(query, execution_options={'yield_per': BATCH_SIZE})
+    try:
+        parts = [''.join(_fold(line) for line in (
+            'BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//Plataforma de Cursos//Mentorias//PT',
+            'CALSCALE:GREGORIAN', 'METHOD:PUBLISH', f'X-WR-CALNAME:{_escape(name)}',
+        ))]
+        size = len(parts[0])
+        for row in result:
+            event = _event(row, domain, admin=user_id is None)
+            parts.append(event)
+            size += len(event)
+            if size >= CHUNK_SIZE:
+                yield ''.join(parts).encode('utf-8')
+                parts, size = [], 0
+        parts.append('END:VCALENDAR\r\n')
+        yield ''.join(parts).encode('utf-8')
+    finally:
+        result.close()
+
+
+def init_app(app):
+    app.config.setdefault('MENTORSHIP_FEED_PAST_DAYS', 30)
+    app.config.setdefault('MENTORSHIP_FEED_FUTURE_DAYS', 365)
@@ -0,0 +1,368 @@
+import atexit
+import contextlib
+import glob
+import json
+import math
+import os
+import threading
+import time
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem compactação dos arquivos de processos encerrados
+    fcntl = None
+
+# Métricas no formato de exposição de texto do Prometheus.
+# Cada processo acumula os valores em memória (um lock curto por registro) e grava
+# um retrato em METRICS_DIR/<pid>.json a cada METRICS_FLUSH_INTERVAL segundos; o
+# /metrics de qualquer worker soma os arquivos de todos os processos.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# nome -> (tipo, ajuda). Gauges somam apenas processos vivos.
+METRICS = {
+    'http_request_duration_seconds': ('histogram', 'Latência das requisições por endpoint.'),
+    'http_requests_total': ('counter', 'Requisições por endpoint e status.'),
+    'http_requests_in_flight': ('gauge', 'Requisições em andamento.'),
+    'db_pool_size': ('gauge', 'Tamanho do pool de conexões por bind.'),
+    'db_pool_checked_out': ('gauge', 'Conexões em uso por bind.'),
+    'db_pool_overflow': ('gauge', 'Conexões abertas além do tamanho do pool por bind.'),
+    'cache_requests_total': ('counter', 'Consultas a caches por resultado (hit/miss).'),
+    'cache_hit_ratio': ('gauge', 'Proporção de hits por cache desde o início.'),
+    'purchases_total': ('counter', 'Cursos comprados.'),
+    'lessons_completed_total': ('counter', 'Aulas concluídas.'),
+    'mentorships_scheduled_total': ('counter', 'Mentorias agendadas.'),
+}
+
+_lock = threading.Lock()
+_counters = {}    # (nome, labels) -> valor
+_gauges = {}
+_histograms = {}  # (nome, labels) -> [contagem por bucket..., +Inf, soma]
+_state = {'app': None, 'dir': None, 'interval': 1.0, 'flusher_pid': None, 'flusher': None}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def gauge_add(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = _gauges.get(key, 0) + value
+
+
+def gauge_set(name, value, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        buckets = _histograms.get(key)
+        if buckets is None:
+            buckets = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                buckets[i] += 1
+                break
+        else:
+            buckets[len(BUCKETS)] += 1
+        buckets[-1] += value
+
+
+def _snapshot():
+    if has_app_context():
+        from models import db
+        for bind, engine in db.engines.items():
+            pool = engine.pool
+            if hasattr(pool, 'size'):
+                bind = bind or 'default'
+                gauge_set('db_pool_size', pool.size(), bind=bind)
+                gauge_set('db_pool_checked_out', pool.checkedout(), bind=bind)
+                gauge_set('db_pool_overflow', max(pool.overflow(), 0), bind=bind)
+    with _lock:
+        return {
+            'counters': [[n, l, v] for (n, l), v in _counters.items()],
+            'gauges': [[n, l, v] for (n, l), v in _gauges.items()],
+            'histograms': [[n, l, list(v)] for (n, l), v in _histograms.items()],
+        }
+
+
+def _write(path, data):
+    tmp = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def flush():
+    directory = _state['dir']
+    if directory is None:
+        return
+    _write(os.path.join(directory, f'{os.getpid()}.json'), _snapshot())
+
+
+def _flush_loop(app, pid):
+    while True:
+        time.sleep(_state['interval'])
+        if _state['flusher_pid'] != pid:
+            return
+        try:
+            with app.app_context():
+                flush()
+        except OSError:
+            pass  # diretório indisponível: tenta de novo no próximo intervalo
+
+
+def start_flusher():
+    # Uma thread por processo grava o retrato mesmo quando o worker está ocioso;
+    # iniciada na primeira requisição, já no processo filho (threads não sobrevivem ao fork)
+    pid = os.getpid()
+    if _state['flusher_pid'] == pid or _state['app'] is None:
+        return
+    with _lock:
+        if _state['flusher_pid'] == pid:
+            return
+        _state['flusher_pid'] = pid
+    _state['flusher'] = threading.Thread(target=_flush_loop, args=(_state['app'], pid),
+                                         daemon=True, name='metrics-flush')
+    _state['flusher'].start()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _merge(total, snapshot, include_gauges):
+    for name, labels, value in snapshot['counters']:
+        key = _key(name, dict(labels))
+        total['counters'][key] = total['counters'].get(key, 0) + value
+    if include_gauges:
+        for name, labels, value in snapshot['gauges']:
+            key = _key(name, dict(labels))
+            total['gauges'][key] = total['gauges'].get(key, 0) + value
+    for name, labels, values in snapshot['histograms']:
+        key = _key(name, dict(labels))
+        current = total['histograms'].setdefault(key, [0] * len(values))
+        total['histograms'][key] = [a + b for a, b in zip(current, values)]
+
+
+def _empty():
+    return {'counters': {}, 'gauges': {}, 'histograms': {}}
+
+
+def _as_snapshot(total):
+    return {kind: [[n, l, v] for (n, l), v in values.items()] for kind, values in total.items()}
+
+
+@contextlib.contextmanager
+def _directory_lock(directory, exclusive):
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, '.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def _compact(directory, dead_paths):
+    # Contadores de workers encerrados (ex.: reciclados por max_requests) vão para
+    # archive.json, para que os arquivos não se acumulem
+    if fcntl is None or not dead_paths:
+        return
+    with _directory_lock(directory, exclusive=True):
+        archive_path = os.path.join(directory, 'archive.json')
+        total = _empty()
+        if os.path.exists(archive_path):
+            with open(archive_path) as f:
+                _merge(total, json.load(f), include_gauges=False)
+        merged = []
+        for path in dead_paths:
+            try:
+                with open(path) as f:
+                    _merge(total, json.load(f), include_gauges=False)
+            except (OSError, ValueError):
+                continue  # já compactado por outro processo
+            merged.append(path)
+        _write(archive_path, _as_snapshot(total))
+        for path in merged:
+            os.remove(path)
+
+
+def collect():
+    """Soma os retratos de todos os processos (o deste processo é lido da memória)."""
+    total = _empty()
+    _merge(total, _snapshot(), include_gauges=True)
+    directory = _state['dir']
+    if directory is None:
+        return total
+    dead = []
+    # Lock compartilhado: a compactação não move contadores para archive.json no meio da leitura
+    with _directory_lock(directory, exclusive=False):
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            name = os.path.basename(path)[:-len('.json')]
+            if name == str(os.getpid()):
+                continue
+            alive = name.isdigit() and _alive(int(name))
+            if name.isdigit() and not alive:
+                dead.append(path)
+            try:
+                with open(path) as f:
+                    _merge(total, json.load(f), include_gauges=alive)
+            except (OSError, ValueError):
+                continue  # arquivo corrompido: fica para a próxima coleta
+    try:
+        _compact(directory, dead)
+    except OSError:
+        pass
+    return total
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ''
+    escaped = (str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, v in items)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    total = collect()
+    hits = {}
+    for (name, labels), value in total['counters'].items():
+        if name == 'cache_requests_total':
+            labels = dict(labels)
+            hits.setdefault(labels['cache'], [0, 0])[labels['result'] == 'hit'] += value
+    for cache, (misses, hit_count) in hits.items():
+        total['gauges'][_key('cache_hit_ratio', {'cache': cache})] = hit_count / ((misses + hit_count) or 1)
+
+    by_name = {}
+    for kind in ('counters', 'gauges', 'histograms'):
+        for (name, labels), value in total[kind].items():
+            by_name.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        samples = by_name.get(name)
+        if not samples:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(samples):
+            if kind != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float('inf'),), value):
+                cumulative += count
+                le = '+Inf' if math.isinf(bound) else repr(bound)
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(float(value[-1]))}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def clear():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+
+def reset():
+    """Zera as métricas e apaga os retratos de execuções anteriores.
+
+    Chamado pelo processo principal do ``flask serve`` depois do aquecimento, para
+    que as requisições de aquecimento não apareçam nem sejam herdadas pelos workers.
+    """
+    _state['flusher_pid'] = None
+    if _state['flusher'] is not None:
+        _state['flusher'].join()
+        _state['flusher'] = None
+    clear()
+    if _state['dir'] is not None:
+        for path in glob.glob(os.path.join(_state['dir'], '*.json')):
+            os.remove(path)
+
+
+def _after_fork():
+    # O processo filho começa do zero (o que o pai contou continua no arquivo do pai)
+    # e com um lock novo, caso o fork tenha acontecido com ele adquirido
+    global _lock
+    _lock = threading.Lock()
+    _state['flusher'] = None
+    clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _statement_cache(conn, cursor, statement, parameters, context, executemany):
+    # Cache de SQL compilado do SQLAlchemy (sem chave de cache, ex.: SQL textual, não conta)
+    if context is None:
+        return
+    if context.cache_hit == CACHE_HIT:
+        inc('cache_requests_total', cache='sql_compiled', result='hit')
+    elif context.cache_hit == CACHE_MISS:
+        inc('cache_requests_total', cache='sql_compiled', result='miss')
+
+
+def _before_request():
+    start_flusher()
+    g._metrics_start = time.perf_counter()
+    gauge_add('http_requests_in_flight', 1)
+
+
+def _after_request(response):
+    g._metrics_status = response.status_code
+    return response
+
+
+def _teardown_request(exc):
+    # Respostas com stream_with_context passam por aqui duas vezes (na volta da view e
+    # ao fechar o gerador): só a primeira conta
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return
+    endpoint = request.endpoint or 'none'
+    observe('http_request_duration_seconds', time.perf_counter() - start, endpoint=endpoint)
+    inc('http_requests_total', endpoint=endpoint, status=str(g.get('_metrics_status', 500)))
+    gauge_add('http_requests_in_flight', -1)
+
+
+def init_app(app):
+    app.config.setdefault('METRICS_DIR', os.path.join(app.instance_path, 'metrics'))
+    app.config.setdefault('METRICS_FLUSH_INTERVAL', 1.0)
+    os.makedirs(app.config['METRICS_DIR'], exist_ok=True)
+    _state['app'] = app
+    _state['dir'] = app.config['METRICS_DIR']
+    _state['interval'] = app.config['METRICS_FLUSH_INTERVAL']
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    atexit.register(flush)
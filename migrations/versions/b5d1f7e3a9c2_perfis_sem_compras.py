@@ -0,0 +1,26 @@
+"""perfis sem compras
+
+Revision ID: b5d1f7e3a9c2
+Revises: a3e9c5b7d1f2
+Create Date: 2026-10-19 21:52:08.640193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d1f7e3a9c2'
+down_revision = 'a3e9c5b7d1f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Os perfis gravados antes traziam os cursos comprados; são montados de novo sem eles
+    # (na próxima alteração do usuário, ou de uma vez com `flask profiles-rebuild`)
+    op.execute('DELETE FROM user_profile')
+
+
+def downgrade():
+    pass
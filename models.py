@@ -1,9 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from flask import current_app
+from itsdangerous import URLSafeSerializer, URLSafeTimedSerializer, BadSignature
 from datetime import datetime
+import hashlib
+import hmac
+from sqlalchemy.orm import deferred, load_only, undefer
+from routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -14,35 +20,97 @@ class User(UserMixin, db.Model):
     profile_picture = db.Column(db.String(200))
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relacionamentos
     purchases = db.relationship('Purchase', backref='user', lazy=True)
     mentorias = db.relationship('Mentorship', backref='user', lazy=True)
 
+    # Busca sem diferenciar maiúsculas (availability.is_taken)
+    __table_args__ = (
+        db.Index('ix_user_username_lower', db.func.lower(username)),
+        db.Index('ix_user_email_lower', db.func.lower(email)),
+        db.Index('ix_user_updated_at', 'updated_at'),  # atualização incremental do índice
+    )
+
     def set_password(self, password):
         self.password = generate_password_hash(password)
 
     def check_password(self, password):
         return check_password_hash(self.password, password)
 
+    # O token carrega parte do hash atual: depois que a senha muda, ele deixa de valer
+    def get_reset_token(self):
+        serializer = URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='redefinir-senha')
+        return serializer.dumps({'id': self.id, 'pw': self.password[-16:]})
+
+    @staticmethod
+    def verify_reset_token(token, max_age=3600):
+        serializer = URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='redefinir-senha')
+        try:
+            data = serializer.loads(token, max_age=max_age)
+        except BadSignature:
+            return None
+        user = db.session.get(User, data.get('id'))
+        if user is None or user.password[-16:] != data.get('pw'):
+            return None
+        return user
+
+    # Link permanente do feed .ics (clientes de calendário não têm a sessão); trocar a
+    # senha também invalida os links antigos. O link vai para serviços de terceiros:
+    # leva um HMAC do hash da senha, nunca um pedaço do hash.
+    def _calendar_key(self):
+        secret = current_app.config['SECRET_KEY'].encode('utf-8')
+        return hmac.new(secret, f'calendario:{self.password}'.encode('utf-8'), hashlib.sha256).hexdigest()[:16]
+
+    def get_calendar_token(self):
+        serializer = URLSafeSerializer(current_app.config['SECRET_KEY'], salt='calendario')
+        return serializer.dumps({'id': self.id, 'k': self._calendar_key()})
+
+    @staticmethod
+    def verify_calendar_token(token):
+        serializer = URLSafeSerializer(current_app.config['SECRET_KEY'], salt='calendario')
+        try:
+            data = serializer.loads(token)
+        except BadSignature:
+            return None
+        user = db.session.get(User, data.get('id'))
+        if user is None or not hmac.compare_digest(user._calendar_key(), str(data.get('k', ''))):
+            return None
+        return user
+
     def __repr__(self):
         return f'<User {self.username}>'
 
 class Course(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    description = db.Column(db.Text, nullable=False)
+    # Textos longos são adiados (deferred): listagens usam excerpt, gerado ao salvar
+    description = deferred(db.Column(db.Text, nullable=False))
+    excerpt = db.Column(db.String(200))
     price = db.Column(db.Float, nullable=False)
     level = db.Column(db.String(20), nullable=False)  # Iniciante, Intermediário, Avançado
     duration = db.Column(db.Integer, nullable=False)  # Duração em horas
     image = db.Column(db.String(200))
     is_featured = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Admin que criou o curso; aparece no perfil dele como "cursos ministrados"
+    instructor_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
     
     # Relacionamentos
-    modules = db.relationship('Module', backref='course', lazy=True, cascade='all, delete-orphan')
+    modules = db.relationship('Module', backref='course', lazy=True, cascade='all, delete-orphan',
+                              order_by='(Module.order, Module.id)')
     purchases = db.relationship('Purchase', backref='course', lazy=True)
 
+    # Filtros e ordenações do catálogo (/cursos)
+    __table_args__ = (
+        db.Index('ix_course_level_price', 'level', 'price'),
+        db.Index('ix_course_price', 'price'),
+        db.Index('ix_course_duration', 'duration'),
+        db.Index('ix_course_created_at', 'created_at'),
+        db.Index('ix_course_title', 'title'),
+    )
+
     def __repr__(self):
         return f'<Course {self.title}>'
 
@@ -54,7 +122,12 @@ class Module(db.Model):
     order = db.Column(db.Integer, default=0)
     
     # Relacionamentos
-    lessons = db.relationship('Lesson', backref='module', lazy=True, cascade='all, delete-orphan')
+    lessons = db.relationship('Lesson', backref='module', lazy=True, cascade='all, delete-orphan',
+                              order_by='(Lesson.order, Lesson.id)')
+
+    __table_args__ = (
+        db.Index('ix_module_course_order', 'course_id', 'order'),
+    )
 
     def __repr__(self):
         return f'<Module {self.title}>'
@@ -62,12 +135,23 @@ class Module(db.Model):
 class Lesson(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    content = db.Column(db.Text, nullable=False)
+    content = deferred(db.Column(db.Text, nullable=False))  # Markdown
+    content_html = deferred(db.Column(db.Text))  # HTML sanitizado, gerado ao salvar (rendering.py)
+    content_hash = db.Column(db.String(64))
+    excerpt = db.Column(db.String(200))
     video_url = db.Column(db.String(200))
+    video_file = db.Column(db.String(200))  # arquivo em VIDEO_FOLDER, servido por /aula/<id>/video
+    material_file = db.Column(db.String(200))  # PDF/anexo em MATERIAL_FOLDER
     module_id = db.Column(db.Integer, db.ForeignKey('module.id'), nullable=False)
     order = db.Column(db.Integer, default=0)
     duration = db.Column(db.Integer, nullable=True)  # duração em minutos
 
+    completions = db.relationship('LessonCompletion', backref='lesson', lazy=True, cascade='all, delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_lesson_module_order', 'module_id', 'order'),
+    )
+
     def __repr__(self):
         return f'<Lesson {self.title}>'
 
@@ -90,4 +174,142 @@ class Mentorship(db.Model):
     status = db.Column(db.String(20), default='pending')  # pending, approved, rejected
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     scheduled_date = db.Column(db.DateTime)
+    duration = db.Column(db.Integer, nullable=False, default=60, server_default='60')  # minutos
     notes = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Calendário por período (do aluno e do admin) e validadores dos feeds .ics
+    __table_args__ = (
+        db.Index('ix_mentorship_scheduled_date', 'scheduled_date'),
+        db.Index('ix_mentorship_user_scheduled', 'user_id', 'scheduled_date'),
+    )
+
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, running, done, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+class Upload(db.Model):
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex, usado na URL do upload
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(200), nullable=False)
+    target = db.Column(db.String(30), nullable=False)  # lesson_video, lesson_material, course_image
+    target_id = db.Column(db.Integer, nullable=False)
+    length = db.Column(db.BigInteger, nullable=False)
+    offset = db.Column(db.BigInteger, default=0, nullable=False)
+    checksum = db.Column(db.String(64))  # sha256 do arquivo completo
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<Upload {self.id} {self.offset}/{self.length}>'
+
+class Blob(db.Model):
+    hash = db.Column(db.String(64), primary_key=True)  # sha256 do conteúdo
+    name = db.Column(db.String(200), unique=True, nullable=False)  # caminho relativo a UPLOAD_FOLDER
+    size = db.Column(db.BigInteger, nullable=False)
+    touched_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<Blob {self.name}>'
+
+class LessonCompletion(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lesson.id'), nullable=False)
+    completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'lesson_id', name='uq_lesson_completion_user_lesson'),
+    )
+
+    def __repr__(self):
+        return f'<LessonCompletion {self.user_id} {self.lesson_id}>'
+
+# Tabelas de resumo para os relatórios do admin (mantidas por analytics.py).
+# Sem chaves estrangeiras: excluir um curso ou aula não depende delas, e linhas
+# órfãs somem na próxima reconstrução.
+class CourseStats(db.Model):
+    course_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    purchases = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Float, default=0, nullable=False)
+    completed_students = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<CourseStats {self.course_id}>'
+
+class LessonStats(db.Model):
+    lesson_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    course_id = db.Column(db.Integer, nullable=False, index=True)
+    completions = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<LessonStats {self.lesson_id}>'
+
+class DailyPurchases(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    course_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    purchases = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Float, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<DailyPurchases {self.day} {self.course_id}>'
+
+# Recomendações "quem comprou também comprou" (mantidas por recommendations.py).
+# CoPurchase guarda a matriz curso x curso de compras em comum; a diagonal
+# (course_id == other_id) é o número de compradores do curso.
+class CoPurchase(db.Model):
+    course_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    other_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<CoPurchase {self.course_id} {self.other_id}>'
+
+class CourseRecommendation(db.Model):
+    course_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    recommended_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    score = db.Column(db.Float, nullable=False)  # similaridade de cosseno
+
+    __table_args__ = (
+        db.Index('ix_course_recommendation_course_score', 'course_id', 'score'),
+    )
+
+    def __repr__(self):
+        return f'<CourseRecommendation {self.course_id} {self.recommended_id}>'
+
+# Posição do aluno em cada aula (mantida por activity.py, gravada em lotes).
+# Sem chaves estrangeiras, como as tabelas de resumo: excluir aulas não depende dela.
+class LessonActivity(db.Model):
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    lesson_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    position = db.Column(db.Float, default=0, nullable=False)  # segundos do vídeo
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_lesson_activity_user_updated', 'user_id', 'updated_at'),
+    )
+
+    def __repr__(self):
+        return f'<LessonActivity {self.user_id} {self.lesson_id}>'
+
+# Projeções para as consultas de cursos e aulas: listagens trazem só colunas curtas;
+# páginas de detalhe carregam o texto adiado na mesma consulta (sem um SELECT extra)
+COURSE_LIST = (load_only(Course.id, Course.title, Course.excerpt, Course.price, Course.level,
+                         Course.duration, Course.image, Course.is_featured),)
+COURSE_DETAIL = (undefer(Course.description),)
+LESSON_DETAIL = (undefer(Lesson.content_html),)
@@ -0,0 +1,68 @@
+from models import db
+
+# Espaço entre chaves de ordenação consecutivas. Mover um item para entre dois
+# vizinhos usa o ponto médio; só quando não sobra espaço os irmãos são renumerados.
+GAP = 1024
+
+
+def siblings_of(model, parent_field, parent_id):
+    return model.query.filter(getattr(model, parent_field) == parent_id)
+
+
+def next_order(model, parent_field, parent_id):
+    """Chave para adicionar um item ao final da lista do pai."""
+    current = (db.session.query(db.func.max(model.order))
+               .filter(getattr(model, parent_field) == parent_id).scalar())
+    return (current or 0) + GAP
+
+
+def renumber(model, parent_field, parent_id, exclude_id=None):
+    """Reescreve as chaves dos irmãos com espaçamento GAP, mantendo a ordem atual."""
+    rows = (db.session.query(model.id)
+            .filter(getattr(model, parent_field) == parent_id, model.id != exclude_id)
+            .order_by(model.order, model.id).all())
+    db.session.bulk_update_mappings(model, [
+        {'id': row.id, 'order': (position + 1) * GAP} for position, row in enumerate(rows)
+    ])
+    db.session.flush()
+
+
+def _between(lower, upper):
+    if lower is None and upper is None:
+        return GAP
+    if upper is None:
+        return lower + GAP
+    if lower is None:
+        return upper - GAP
+    if upper - lower > 1:
+        return (lower + upper) // 2
+    return None
+
+
+def _neighbours(item, model, parent_field, after_id):
+    others = siblings_of(model, parent_field, getattr(item, parent_field)).filter(model.id != item.id)
+    if after_id is None:
+        return None, others.order_by(model.order, model.id).first()
+    previous = others.filter(model.id == after_id).first()
+    if previous is None:
+        raise ValueError('Item de referência não pertence à mesma lista')
+    following = (others.filter(db.or_(model.order > previous.order,
+                                      db.and_(model.order == previous.order, model.id > previous.id)))
+                 .order_by(model.order, model.id).first())
+    return previous, following
+
+
+def move(item, model, parent_field, after_id=None):
+    """Posiciona ``item`` logo depois do irmão ``after_id`` (ou no início, se None).
+
+    No caso comum só a linha do próprio item é atualizada.
+    """
+    previous, following = _neighbours(item, model, parent_field, after_id)
+    key = _between(previous.order if previous else None, following.order if following else None)
+    if key is None:
+        renumber(model, parent_field, getattr(item, parent_field), exclude_id=item.id)
+        db.session.refresh(previous)
+        db.session.refresh(following)
+        key = _between(previous.order, following.order)
+    item.order = key
+    return key
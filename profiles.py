@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event, inspect, select
+
+import metrics
+from models import db, User, Course
+from routing import RoutingSession
+
+# Perfil público em cache por processo, por username: dados do usuário e derivados
+# (cursos ministrados, data de cadastro) já montados, sem consultas numa visita repetida.
+# Um commit deste processo que mexe nos campos exibidos troca a entrada de uma vez: a
+# chave antiga sai e, numa troca de username, a nova entra com os dados já gravados.
+# Mudanças nos cursos ministrados descartam o perfil do instrutor. Para gravações de
+# outros workers, a entrada vence em PROFILE_CACHE_TTL segundos.
+FIELDS = ('username', 'email', 'bio', 'profile_picture', 'created_at')
+COURSE_FIELDS = ('title', 'instructor_id')
+
+
+def _member_since(created_at):
+    return created_at.strftime('%d/%m/%Y') if created_at else None
+
+
+def build(user):
+    courses = db.session.execute(
+        select(Course.id, Course.title).where(Course.instructor_id == user.id).order_by(Course.title, Course.id)
+    ).all()
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'bio': user.bio,
+        'profile_picture': user.profile_picture,
+        'member_since': _member_since(user.created_at),
+        'courses': [{'id': course.id, 'title': course.title} for course in courses],
+    }
+
+
+class _ProfileCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # username -> (perfil, carregado em)
+        # Muda a cada descarte: um perfil montado antes dele não entra no cache
+        self.generation = 0
+
+    def get(self, username):
+        with self.lock:
+            entry = self.entries.get(username)
+            generation = self.generation
+            if entry is not None:
+                self.entries.move_to_end(username)
+        if entry is not None and time.monotonic() - entry[1] < current_app.config['PROFILE_CACHE_TTL']:
+            return entry[0], generation
+        return None, generation
+
+    def put(self, profile, generation):
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[profile['username']] = (profile, time.monotonic())
+            self.entries.move_to_end(profile['username'])
+            while len(self.entries) > current_app.config['PROFILE_CACHE_SIZE']:
+                self.entries.popitem(last=False)
+
+    def apply(self, users, instructor_ids):
+        """Aplica as mudanças de um commit: ``users`` é {id: (usernames antigos, campos ou None)}."""
+        with self.lock:
+            self.generation += 1
+            for user_id, (old_usernames, values) in users.items():
+                cached = [self.entries.pop(name)[0] for name in old_usernames if name in self.entries]
+                # Os cursos ministrados não mudam com os campos do usuário: a nova chave já
+                # nasce completa se o perfil antigo estava em cache
+                if values is not None and cached and user_id not in instructor_ids:
+                    profile = dict(cached[0], **values)
+                    self.entries[profile['username']] = (profile, time.monotonic())
+            if instructor_ids:
+                for name in [name for name, (profile, _) in self.entries.items() if profile['id'] in instructor_ids]:
+                    del self.entries[name]
+
+
+_cache = _ProfileCache()
+
+
+def get(username):
+    profile, generation = _cache.get(username)
+    if profile is not None:
+        metrics.inc('cache_requests_total', cache='profile', result='hit')
+        return profile
+    metrics.inc('cache_requests_total', cache='profile', result='miss')
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        return None
+    profile = build(user)
+    _cache.put(profile, generation)
+    return profile
+
+
+def _values(user):
+    return {'username': user.username, 'email': user.email, 'bio': user.bio,
+            'profile_picture': user.profile_picture, 'member_since': _member_since(user.created_at)}
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect(session, flush_context):
+    # Os valores são lidos aqui: depois do commit os atributos já expiraram
+    users = session.info.setdefault('profile_users', {})
+    instructors = session.info.setdefault('profile_instructors', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        state = inspect(obj)
+        if isinstance(obj, User):
+            history = state.attrs.username.history
+            if obj in session.dirty and not any(state.attrs[field].history.has_changes() for field in FIELDS):
+                continue
+            old_usernames = users.get(obj.id, (set(), None))[0]
+            old_usernames |= set(history.deleted) | set(history.unchanged) | set(history.added)
+            users[obj.id] = (old_usernames, None if obj in session.deleted else _values(obj))
+        elif isinstance(obj, Course):
+            if obj in session.dirty and not any(state.attrs[field].history.has_changes() for field in COURSE_FIELDS):
+                continue
+            history = state.attrs.instructor_id.history
+            instructors.update(value for value in (*history.deleted, *history.unchanged, *history.added)
+                               if value is not None)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    users = session.info.pop('profile_users', None)
+    instructors = session.info.pop('profile_instructors', None)
+    if users or instructors:
+        _cache.apply(users or {}, instructors or set())
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _rolled_back(session):
+    session.info.pop('profile_users', None)
+    session.info.pop('profile_instructors', None)
+
+
+def init_app(app):
+    app.config.setdefault('PROFILE_CACHE_TTL', 60)
+    app.config.setdefault('PROFILE_CACHE_SIZE', 10000)
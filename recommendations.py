@@ -0,0 +1,187 @@
+import math
+from itertools import combinations
+
+from flask import current_app
+from sqlalchemy import delete, event, select
+from sqlalchemy.orm import aliased
+
+from analytics import increment
+from jobs import enqueue, handler
+from models import db, Course, Purchase, CoPurchase, CourseRecommendation
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # opcional: sem NumPy/SciPy a reconstrução conta os pares em Python puro
+    np = sparse = None
+
+# "Quem comprou este curso também comprou": similaridade de cosseno entre as colunas
+# da matriz usuário x curso (binária). Para compras, cos(i, j) = C[i,j] / sqrt(C[i,i] * C[j,j]),
+# onde C = XᵀX é a matriz de compras em comum (tabela CoPurchase).
+#
+# - rebuild(): recalcula C e os top-k de todos os cursos (job em lote, `flask recommendations-rebuild`);
+# - cada compra soma 1 nos pares do curso com os que o aluno já tinha, na mesma transação,
+#   e agenda o recálculo dos top-k desses cursos e dos vizinhos do curso comprado: C[i,i]
+#   mudou, e com ele cos(x, i) para todo curso x comprado junto com i.
+
+
+@event.listens_for(Purchase, 'after_insert')
+def _purchase_inserted(mapper, connection, purchase):
+    owned = connection.execute(
+        select(Purchase.course_id).where(Purchase.user_id == purchase.user_id,
+                                         Purchase.course_id != purchase.course_id)
+    ).scalars().all()
+    course_id = purchase.course_id
+    increment(connection, CoPurchase, {'course_id': course_id, 'other_id': course_id}, count=1)
+    for other_id in set(owned):
+        increment(connection, CoPurchase, {'course_id': course_id, 'other_id': other_id}, count=1)
+        increment(connection, CoPurchase, {'course_id': other_id, 'other_id': course_id}, count=1)
+
+
+def schedule_update(user_id, course_id):
+    """Agenda o recálculo dos vizinhos afetados pela compra (gravado com o commit do chamador)."""
+    return enqueue('recommendations_update', {'user_id': user_id, 'course_id': course_id})
+
+
+def _top_k(course_id, k):
+    other = aliased(CoPurchase)
+    buyers = db.session.execute(
+        select(CoPurchase.count).where(CoPurchase.course_id == course_id, CoPurchase.other_id == course_id)
+    ).scalar()
+    if not buyers:
+        return []
+    rows = db.session.execute(
+        select(CoPurchase.other_id, CoPurchase.count, other.count.label('other_buyers'))
+        .join(other, (other.course_id == CoPurchase.other_id) & (other.other_id == CoPurchase.other_id))
+        .where(CoPurchase.course_id == course_id, CoPurchase.other_id != course_id)
+    ).all()
+    scored = [(row.count / math.sqrt(buyers * row.other_buyers), row.other_id) for row in rows]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return scored[:k]
+
+
+def refresh(course_ids):
+    """Recalcula os top-k de ``course_ids`` a partir da tabela CoPurchase."""
+    k = current_app.config['RECOMMENDATIONS_TOP_K']
+    db.session.execute(delete(CourseRecommendation).where(CourseRecommendation.course_id.in_(course_ids)))
+    rows = [
+        {'course_id': course_id, 'recommended_id': other_id, 'score': score}
+        for course_id in course_ids
+        for score, other_id in _top_k(course_id, k)
+    ]
+    if rows:
+        db.session.execute(CourseRecommendation.__table__.insert(), rows)
+
+
+@handler('recommendations_update')
+def _update_batch(payloads):
+    purchased = {p['course_id'] for p in payloads}
+    users = {p['user_id'] for p in payloads}
+    affected = set(purchased)
+    affected.update(db.session.scalars(select(Purchase.course_id).where(Purchase.user_id.in_(users))))
+    affected.update(db.session.scalars(select(CoPurchase.course_id).where(CoPurchase.other_id.in_(purchased))))
+    refresh(sorted(affected))
+    return [None] * len(payloads)
+
+
+def _purchase_matrix():
+    """(user_ids, course_ids) de todas as compras, um par por compra."""
+    rows = db.session.execute(
+        select(Purchase.user_id, Purchase.course_id).distinct().execution_options(yield_per=10000)
+    )
+    users, courses = [], []
+    for user_id, course_id in rows:
+        users.append(user_id)
+        courses.append(course_id)
+    return users, courses
+
+
+def _similarities_scipy(users, courses, k):
+    user_index, user_codes = np.unique(np.asarray(users), return_inverse=True)
+    course_index, course_codes = np.unique(np.asarray(courses), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(users), dtype=np.int32), (user_codes, course_codes)),
+        shape=(len(user_index), len(course_index)),
+    )
+    co = (matrix.T @ matrix).tocsr()
+    scale = sparse.diags(1 / np.sqrt(co.diagonal().astype(np.float64)))
+    similarity = (scale @ co @ scale).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    rows = []
+    for i in range(similarity.shape[0]):
+        start, end = similarity.indptr[i], similarity.indptr[i + 1]
+        scores, columns = similarity.data[start:end], similarity.indices[start:end]
+        # Empates ficam com o menor id (índices da linha estão em ordem crescente)
+        for position in np.argsort(-scores, kind='stable')[:k]:
+            rows.append({'course_id': int(course_index[i]),
+                         'recommended_id': int(course_index[columns[position]]),
+                         'score': float(scores[position])})
+    co = co.tocoo()
+    counts = {
+        (int(course_index[i]), int(course_index[j])): int(count)
+        for i, j, count in zip(co.row, co.col, co.data)
+    }
+    return counts, rows
+
+
+def _co_counts_python(users, courses):
+    by_user = {}
+    for user_id, course_id in zip(users, courses):
+        by_user.setdefault(user_id, []).append(course_id)
+    counts = {}
+    for owned in by_user.values():
+        for course_id in owned:
+            counts[(course_id, course_id)] = counts.get((course_id, course_id), 0) + 1
+        for a, b in combinations(owned, 2):
+            counts[(a, b)] = counts.get((a, b), 0) + 1
+            counts[(b, a)] = counts.get((b, a), 0) + 1
+    return counts
+
+
+def _top_k_all(counts, k):
+    by_course = {}
+    for (course_id, other_id), count in counts.items():
+        if course_id != other_id:
+            score = count / math.sqrt(counts[(course_id, course_id)] * counts[(other_id, other_id)])
+            by_course.setdefault(course_id, []).append((score, other_id))
+    rows = []
+    for course_id, scored in by_course.items():
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        rows.extend({'course_id': course_id, 'recommended_id': other_id, 'score': score}
+                    for score, other_id in scored[:k])
+    return rows
+
+
+def rebuild():
+    """Recalcula a matriz de compras em comum e os top-k de todos os cursos. Retorna o número de pares."""
+    k = current_app.config['RECOMMENDATIONS_TOP_K']
+    users, courses = _purchase_matrix()
+    if sparse is not None and users:
+        counts, recommendations = _similarities_scipy(users, courses, k)
+    else:
+        counts = _co_counts_python(users, courses)
+        recommendations = _top_k_all(counts, k)
+
+    db.session.execute(delete(CoPurchase))
+    db.session.execute(delete(CourseRecommendation))
+    if counts:
+        db.session.execute(CoPurchase.__table__.insert(), [
+            {'course_id': course_id, 'other_id': other_id, 'count': count}
+            for (course_id, other_id), count in counts.items()
+        ])
+        if recommendations:
+            db.session.execute(CourseRecommendation.__table__.insert(), recommendations)
+    return len(counts)
+
+
+def for_course(course_id, limit=None):
+    """Cursos recomendados para ``course_id`` (uma consulta pelo índice course_id, score)."""
+    return (
+        Course.query.join(CourseRecommendation, CourseRecommendation.recommended_id == Course.id)
+        .filter(CourseRecommendation.course_id == course_id)
+        .order_by(CourseRecommendation.score.desc())
+        .limit(limit or current_app.config['RECOMMENDATIONS_TOP_K'])
+        .all()
+    )
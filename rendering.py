@@ -0,0 +1,131 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from html import unescape
+
+import markdown
+import nh3
+from sqlalchemy import bindparam, event, inspect, select
+
+from models import db, Course, Lesson
+
+# Conteúdo das aulas em Markdown, convertido em HTML (com destaque de sintaxe via
+# Pygments) e sanitizado uma única vez, ao salvar. A página da aula só imprime
+# Lesson.content_html. Lesson.content_hash identifica texto + versão do renderizador:
+# ao mudar extensões, tags permitidas ou o estilo, incremente RENDERER_VERSION e rode
+# `flask render-lessons`, que refaz só as aulas com hash diferente.
+#
+# Também ficam prontos ao salvar os resumos (excerpt) de cursos e aulas usados nas
+# listagens, que assim não precisam carregar os textos longos (colunas deferred).
+RENDERER_VERSION = 2
+EXCERPT_LENGTH = 150
+EXTENSIONS = ['fenced_code', 'codehilite', 'tables', 'sane_lists', 'nl2br']
+EXTENSION_CONFIGS = {'codehilite': {'css_class': 'highlight', 'guess_lang': False}}
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'del', 'div', 'em', 'h1', 'h2', 'h3', 'h4',
+    'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 'span', 'strong', 'sub', 'sup',
+    'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title'},
+    'div': {'class'},
+    'span': {'class'},
+    'code': {'class'},
+    'th': {'align'},
+    'td': {'align'},
+}
+_local = threading.local()
+
+
+def content_hash(text):
+    return hashlib.sha256(f'{RENDERER_VERSION}\0{text or ""}'.encode('utf-8')).hexdigest()
+
+
+def render(text):
+    """Markdown -> HTML sanitizado (sem depender do app: roda também nos processos do pool)."""
+    converter = getattr(_local, 'converter', None)
+    if converter is None:
+        converter = _local.converter = markdown.Markdown(extensions=EXTENSIONS, extension_configs=EXTENSION_CONFIGS)
+    html = converter.reset().convert(text or '')
+    return nh3.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, link_rel='noopener noreferrer')
+
+
+def excerpt(text, length=EXCERPT_LENGTH):
+    """Primeiros ``length`` caracteres de ``text``, cortado no fim de uma palavra."""
+    text = ' '.join((text or '').split())
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(' ', 1)[0] + '…'
+
+
+def plain_text(html):
+    return unescape(nh3.clean(html, tags=set()))
+
+
+def _render_rows(rows):
+    rendered = []
+    for lesson_id, text in rows:
+        html = render(text)
+        rendered.append({'lesson_id': lesson_id, 'html': html, 'hash': content_hash(text),
+                         'summary': excerpt(plain_text(html))})
+    return rendered
+
+
+@event.listens_for(Lesson, 'before_insert')
+@event.listens_for(Lesson, 'before_update')
+def _render_lesson(mapper, connection, lesson):
+    if 'content' not in inspect(lesson).dict:
+        return  # texto adiado e não carregado: não foi alterado
+    digest = content_hash(lesson.content)
+    if lesson.content_hash != digest:
+        lesson.content_html = render(lesson.content)
+        lesson.content_hash = digest
+        lesson.excerpt = excerpt(plain_text(lesson.content_html))
+
+
+@event.listens_for(Course, 'before_insert')
+@event.listens_for(Course, 'before_update')
+def _course_excerpt(mapper, connection, course):
+    if 'description' in inspect(course).dict:
+        course.excerpt = excerpt(course.description)
+
+
+def html(lesson):
+    """HTML da aula; aulas ainda não renderizadas (antes de `flask render-lessons`) são convertidas na hora.
+
+    Carregue a aula com LESSON_DETAIL para trazer content_html na mesma consulta.
+    """
+    if lesson.content_hash is None:
+        return render(lesson.content)
+    return lesson.content_html
+
+
+def rerender(processes=None, batch_size=200, force=False):
+    """Renderiza de novo as aulas desatualizadas num pool de processos. Retorna (verificadas, renderizadas)."""
+    statement = (
+        Lesson.__table__.update()
+        .where(Lesson.__table__.c.id == bindparam('lesson_id'))
+        .values(content_html=bindparam('html'), content_hash=bindparam('hash'), excerpt=bindparam('summary'))
+    )
+    processes = processes or os.cpu_count() or 1
+    checked = rendered = last_id = 0
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        while True:
+            # Uma página por vez (pelo id), com um lote por processo do pool
+            rows = db.session.execute(
+                select(Lesson.id, Lesson.content, Lesson.content_hash)
+                .where(Lesson.id > last_id).order_by(Lesson.id).limit(batch_size * processes)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            checked += len(rows)
+            stale = [(row.id, row.content) for row in rows if force or row.content_hash != content_hash(row.content)]
+            batches = [stale[i:i + batch_size] for i in range(0, len(stale), batch_size)]
+            for results in pool.map(_render_rows, batches):
+                db.session.execute(statement, results)
+                rendered += len(results)
+            db.session.commit()
+    return checked, rendered
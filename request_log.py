@@ -0,0 +1,169 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import current_app, g, has_request_context, request, session
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import metrics
+
+# Log estruturado das requisições: uma linha JSON por requisição (rota, status,
+# latência, usuário, número de consultas SQL). A requisição só enfileira o registro;
+# uma thread por processo (QueueListener) formata e escreve no destino, então disco
+# ou stdout lentos não entram na latência. Fila cheia descarta o registro e conta em
+# /metrics (log_records_dropped_total) em vez de bloquear.
+#
+# Sucessos são amostrados por endpoint (LOG_SAMPLE_RATES, padrão LOG_SAMPLE_RATE);
+# erros (status >= 400) e requisições lentas (>= LOG_SLOW_MS) são sempre registrados.
+# Cada linha traz a taxa aplicada em "sample_rate" para reponderar as contagens.
+logger = logging.getLogger('plataforma.requests')
+logger.propagate = False
+logger.setLevel(logging.INFO)
+
+metrics.METRICS['log_records_dropped_total'] = ('counter', 'Registros de log descartados com a fila cheia.')
+
+_state = {'pid': None, 'listener': None, 'handler': None}
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.msg, ensure_ascii=False, separators=(',', ':'))
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # A formatação fica para a thread de escrita
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc('log_records_dropped_total')
+
+
+def _target(app):
+    path = app.config['LOG_FILE']
+    if path:
+        # WatchedFileHandler reabre o arquivo depois de uma rotação (logrotate)
+        handler = logging.handlers.WatchedFileHandler(path, encoding='utf-8')
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def start(app):
+    """Inicia a thread de escrita deste processo (uma vez por pid, como no metrics)."""
+    pid = os.getpid()
+    if _state['pid'] == pid:
+        return
+    with _lock:
+        if _state['pid'] == pid:
+            return
+        if _state['handler'] is not None:
+            logger.removeHandler(_state['handler'])
+        records = queue.Queue(maxsize=app.config['LOG_QUEUE_SIZE'])
+        listener = logging.handlers.QueueListener(records, _target(app))
+        listener.start()
+        _state['handler'] = DroppingQueueHandler(records)
+        logger.addHandler(_state['handler'])
+        _state['listener'] = listener
+        _state['pid'] = pid
+
+
+def stop():
+    """Esvazia a fila e encerra a thread de escrita (chamado na saída do processo)."""
+    listener = _state['listener']
+    if listener is not None and _state['pid'] == os.getpid():
+        listener.stop()
+        _state['listener'] = None
+        _state['pid'] = None
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g._log_queries = g.get('_log_queries', 0) + 1
+
+
+def _before_request():
+    start(current_app._get_current_object())
+    g._log_start = time.perf_counter()
+
+
+def _sample_rate(endpoint):
+    config = current_app.config
+    return config['LOG_SAMPLE_RATES'].get(endpoint, config['LOG_SAMPLE_RATE'])
+
+
+def _user_id():
+    # Usuário já carregado pela requisição; senão o id guardado na sessão pelo
+    # Flask-Login (sem consulta); só o login por cookie "lembrar" carrega o usuário aqui
+    user = g.get('_login_user')
+    if user is None:
+        user_id = session.get('_user_id')
+        if user_id is not None:
+            return int(user_id)
+        user = current_user
+    return user.id if user.is_authenticated else None
+
+
+def _teardown_request(exc):
+    # Respostas com stream_with_context passam por aqui duas vezes (na volta da view e
+    # ao fechar o gerador): só a primeira registra
+    start = g.pop('_log_start', None)
+    if start is None:
+        return
+    latency_ms = (time.perf_counter() - start) * 1000
+    status = g.get('_log_status', 500)
+    endpoint = request.endpoint or 'none'
+    rate = 1.0
+    if status < 400 and latency_ms < current_app.config['LOG_SLOW_MS']:
+        rate = _sample_rate(endpoint)
+        if rate <= 0 or random.random() >= rate:
+            return
+    entry = {
+        'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        'method': request.method,
+        'route': request.url_rule.rule if request.url_rule else None,
+        'path': request.path,
+        'endpoint': endpoint,
+        'status': status,
+        'latency_ms': round(latency_ms, 2),
+        'user_id': _user_id(),
+        'queries': g.get('_log_queries', 0),
+        'sample_rate': rate,
+        'pid': os.getpid(),
+    }
+    if exc is not None:
+        entry['error'] = f'{type(exc).__name__}: {exc}'
+    logger.info(entry)
+
+
+def _after_request(response):
+    g._log_status = response.status_code
+    return response
+
+
+def init_app(app):
+    app.config.setdefault('LOG_FILE', None)
+    app.config.setdefault('LOG_QUEUE_SIZE', 10000)
+    app.config.setdefault('LOG_SAMPLE_RATE', 1.0)
+    app.config.setdefault('LOG_SAMPLE_RATES', {})
+    app.config.setdefault('LOG_SLOW_MS', 500)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    atexit.register(stop)
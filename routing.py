@@ -0,0 +1,67 @@
+import random
+import sqlite3
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+# Leituras de requisições GET/HEAD vão para uma réplica (binds listados em DB_REPLICAS);
+# escritas, e qualquer leitura depois de uma escrita, vão para o primário.
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+STICKY_KEY = '_db_primary_until'
+# Chave do environ WSGI que força o primário (requisições internas, ex.: freeze.py,
+# que rodam logo após um commit e não podem ler uma réplica atrasada)
+PRIMARY_ENVIRON_KEY = 'plataforma.db_primary'
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase) and use_replica():
+            replicas = current_app.config['DB_REPLICAS']
+            return self._db.engines[random.choice(replicas)]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_replica():
+    return has_request_context() and g.get('db_use_replica', False)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(db_session, flush_context):
+    if not has_request_context():
+        return
+    # O resto desta requisição lê do primário, e o usuário também nas próximas
+    # DB_REPLICA_STICKY_SECONDS, até a réplica alcançar a própria escrita
+    g.db_use_replica = False
+    session[STICKY_KEY] = time.time() + current_app.config['DB_REPLICA_STICKY_SECONDS']
+
+
+def _choose_bind():
+    g.db_use_replica = (
+        bool(current_app.config.get('DB_REPLICAS'))
+        and request.method in READ_METHODS
+        and not request.environ.get(PRIMARY_ENVIRON_KEY)
+        and session.get(STICKY_KEY, 0) < time.time()
+    )
+
+
+def init_app(app):
+    app.config.setdefault('DB_REPLICAS', [])
+    app.config.setdefault('DB_REPLICA_STICKY_SECONDS', 5)
+    app.before_request(_choose_bind)
+
+
+def sync_sqlite(primary_path, replica_paths):
+    """Copia o banco SQLite primário para as réplicas (para testar o roteamento localmente)."""
+    source = sqlite3.connect(primary_path)
+    try:
+        for path in replica_paths:
+            target = sqlite3.connect(path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+    finally:
+        source.close()
@@ -0,0 +1,219 @@
+import bisect
+import itertools
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from werkzeug.security import generate_password_hash
+
+import analytics
+import availability
+import freeze
+import rendering
+import recommendations
+from models import db, User, Course, Module, Lesson, Purchase, LessonCompletion, Mentorship
+
+# Dados sintéticos em escala de produção para testes de carga (flask seed).
+PRESETS = {
+    'pequeno': {'users': 1_000, 'courses': 20, 'modules': 4, 'lessons': 5, 'purchases_per_user': 2.0, 'mentorship_rate': 0.1},
+    'medio': {'users': 100_000, 'courses': 200, 'modules': 5, 'lessons': 6, 'purchases_per_user': 2.0, 'mentorship_rate': 0.05},
+    'grande': {'users': 1_000_000, 'courses': 1_000, 'modules': 5, 'lessons': 6, 'purchases_per_user': 2.5, 'mentorship_rate': 0.03},
+}
+PASSWORD = 'senha123'
+TOPICS = ['Excel', 'Word', 'Canva', 'Python', 'Marketing Digital', 'Inteligência Artificial', 'Finanças',
+          'Fotografia', 'Oratória', 'Gestão de Projetos', 'Inglês', 'Power BI', 'SQL', 'Vendas', 'UX Design']
+LEVELS = ['Iniciante', 'Intermediário', 'Avançado']
+DAYS = 365
+
+
+class Report:
+    def __init__(self, echo):
+        self.echo = echo
+        self.count = 0
+        self.seconds = 0.0
+
+    def line(self, name, count, seconds):
+        rate = count / seconds if seconds else 0
+        self.echo(f'{name:<20}{count:>12,} linhas {seconds:>8.1f} s {rate:>12,.0f} linhas/s')
+
+    def table(self, name, count, seconds):
+        self.count += count
+        self.seconds += seconds
+        self.line(name, count, seconds)
+
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _insert(model, rows, batch_size):
+    """Insere ``rows`` (gerador de dicts) em lotes de ``batch_size``; devolve o total inserido.
+
+    Cada lote é um único executemany do Core: o SQLite reaproveita o mesmo statement
+    preparado e drivers como psycopg enviam INSERTs com várias linhas (insertmanyvalues).
+    """
+    table = model.__table__
+    total = 0
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return total
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+        total += len(batch)
+
+
+def _popularity(rng, course_ids):
+    # Zipf (s=1.1) sobre uma ordem aleatória: poucos cursos concentram a maior parte das vendas
+    ranked = course_ids[:]
+    rng.shuffle(ranked)
+    cumulative = list(itertools.accumulate(1 / (rank ** 1.1) for rank in range(1, len(ranked) + 1)))
+    return ranked, cumulative
+
+
+def _sample_courses(rng, ranked, cumulative, count):
+    chosen = set()
+    while len(chosen) < count:
+        chosen.add(ranked[bisect.bisect(cumulative, rng.random() * cumulative[-1])])
+    return chosen
+
+
+def run(scale='pequeno', batch_size=5000, random_seed=42, rebuild=True, echo=print):
+    preset = PRESETS[scale]
+    rng = random.Random(random_seed)
+    report = Report(echo)
+    now = datetime.utcnow()
+    # Um único hash para todos os usuários: gerar um por usuário (pbkdf2/scrypt) levaria horas
+    password_hash = generate_password_hash(PASSWORD)
+
+    first_user = _next_id(User)
+    user_ids = range(first_user, first_user + preset['users'])
+
+    def users():
+        for user_id in user_ids:
+            yield {'id': user_id, 'username': f'aluno{user_id}', 'email': f'aluno{user_id}@exemplo.com',
+                   'password': password_hash, 'is_admin': False,
+                   'created_at': now - timedelta(days=rng.uniform(0, DAYS))}
+
+    start = time.perf_counter()
+    report.table('usuários', _insert(User, users(), batch_size), time.perf_counter() - start)
+
+    # Catálogo: cursos, módulos e aulas com ids conhecidos de antemão
+    start = time.perf_counter()
+    first_course, first_module, first_lesson = _next_id(Course), _next_id(Module), _next_id(Lesson)
+    course_ids = list(range(first_course, first_course + preset['courses']))
+    courses, modules, lessons = [], [], []
+    course_lessons = {}
+    rendered = {}  # o mesmo texto se repete em todos os cursos: renderiza uma vez
+    module_id, lesson_id = first_module, first_lesson
+    for course_id in course_ids:
+        topic, level = rng.choice(TOPICS), rng.choice(LEVELS)
+        description = f'Curso de {topic} para o nível {level.lower()}.'
+        courses.append({'id': course_id, 'title': f'{topic} {level} #{course_id}',
+                        'description': description, 'excerpt': rendering.excerpt(description),
+                        'price': rng.choice([97.0, 147.0, 197.0, 247.0, 297.0, 497.0]),
+                        'duration': rng.randint(5, 40), 'level': level, 'is_featured': rng.random() < 0.05})
+        course_lessons[course_id] = []
+        for m in range(1, preset['modules'] + 1):
+            modules.append({'id': module_id, 'title': f'Módulo {m}', 'description': '',
+                            'course_id': course_id, 'order': m * 1024})
+            for n in range(1, preset['lessons'] + 1):
+                content = f'Conteúdo da aula {m}.{n}.'
+                if content not in rendered:
+                    html = rendering.render(content)
+                    rendered[content] = {'content_html': html, 'content_hash': rendering.content_hash(content),
+                                         'excerpt': rendering.excerpt(rendering.plain_text(html))}
+                lessons.append({'id': lesson_id, 'title': f'Aula {m}.{n}', 'content': content, **rendered[content],
+                                'duration': rng.randint(3, 30), 'module_id': module_id, 'order': n * 1024})
+                course_lessons[course_id].append(lesson_id)
+                lesson_id += 1
+            module_id += 1
+    count = sum(_insert(model, iter(rows), batch_size)
+                for model, rows in ((Course, courses), (Module, modules), (Lesson, lessons)))
+    report.table('catálogo', count, time.perf_counter() - start)
+
+    ranked, cumulative = _popularity(rng, course_ids)
+    # Chance de continuar para a próxima aula: a maioria abandona nas primeiras
+    keep_going = 0.85
+
+    def purchases():
+        purchase_id = _next_id(Purchase)
+        mean = preset['purchases_per_user']
+        for user_id in user_ids:
+            # Geométrica em {1, 2, ...} com média ``mean`` (p = 1 / mean)
+            count = 1 + int(math.log(1 - rng.random()) / math.log(1 - 1 / mean)) if mean > 1 else 1
+            count = min(count, len(course_ids))
+            for course_id in _sample_courses(rng, ranked, cumulative, count):
+                # Vendas crescem ao longo do ano: mais compras recentes
+                days_ago = DAYS * (1 - rng.random() ** 0.5)
+                yield {'id': purchase_id, 'user_id': user_id, 'course_id': course_id,
+                       'purchase_date': now - timedelta(days=days_ago), 'status': 'active', 'progress': 0}
+                purchase_id += 1
+
+    completions_queue = []
+
+    def purchases_with_completions():
+        for purchase in purchases():
+            completions_queue.append(purchase)
+            yield purchase
+
+    def completions():
+        while completions_queue:
+            purchase = completions_queue.pop()
+            when = purchase['purchase_date']
+            for lesson in course_lessons[purchase['course_id']]:
+                if rng.random() > keep_going:
+                    break
+                when += timedelta(hours=rng.uniform(1, 72))
+                if when > now:
+                    break
+                yield {'user_id': purchase['user_id'], 'lesson_id': lesson, 'completed_at': when}
+
+    # Compras e conclusões são geradas juntas, lote a lote, sem guardar todas na memória
+    purchase_count = completion_count = 0
+    purchase_seconds = completion_seconds = 0.0
+    source = purchases_with_completions()
+    while True:
+        start = time.perf_counter()
+        inserted = _insert(Purchase, itertools.islice(source, batch_size), batch_size)
+        purchase_seconds += time.perf_counter() - start
+        if not inserted:
+            break
+        purchase_count += inserted
+        start = time.perf_counter()
+        completion_count += _insert(LessonCompletion, completions(), batch_size)
+        completion_seconds += time.perf_counter() - start
+    report.table('compras', purchase_count, purchase_seconds)
+    report.table('conclusões', completion_count, completion_seconds)
+
+    def mentorships():
+        for user_id in user_ids:
+            if rng.random() >= preset['mentorship_rate']:
+                continue
+            scheduled = now + timedelta(days=rng.uniform(-60, 30))
+            yield {'user_id': user_id, 'subject': 'Mentoria', 'description': 'Gerada por flask seed',
+                   'status': 'pending' if scheduled > now else rng.choice(['approved', 'rejected']),
+                   'created_at': scheduled - timedelta(days=rng.uniform(1, 30)),
+                   'scheduled_date': scheduled.replace(minute=0, second=0, microsecond=0), 'notes': ''}
+
+    start = time.perf_counter()
+    report.table('mentorias', _insert(Mentorship, mentorships(), batch_size), time.perf_counter() - start)
+    report.line('total', report.count, report.seconds)
+
+    if rebuild:
+        # INSERTs em massa não disparam os eventos do ORM: recalcula os resumos derivados
+        for name, fn in (('relatórios', analytics.rebuild), ('recomendações', recommendations.rebuild)):
+            start = time.perf_counter()
+            fn()
+            db.session.commit()
+            echo(f'{name} recalculados em {time.perf_counter() - start:.1f} s')
+        start = time.perf_counter()
+        availability.rebuild()
+        echo(f'índice de disponibilidade refeito em {time.perf_counter() - start:.1f} s')
+        if freeze.enabled():
+            start = time.perf_counter()
+            written, removed, _static = freeze.freeze()
+            echo(f'catálogo estático: {written} página(s) gravada(s), {removed} removida(s) '
+                 f'em {time.perf_counter() - start:.1f} s')
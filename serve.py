@@ -0,0 +1,109 @@
+import os
+
+import metrics
+
+# Hooks de aquecimento executados antes de o servidor aceitar tráfego.
+# 'master' roda uma vez no processo principal, antes do fork: o que ele carrega
+# (templates compilados, cache de SQL do SQLAlchemy) é herdado pelos workers por
+# copy-on-write. 'worker' roda em cada worker logo após o fork (ex.: conexões,
+# que não podem ser compartilhadas entre processos).
+WARMUP_HOOKS = {'master': [], 'worker': []}
+# Executados quando um worker termina (reciclagem por max_requests, SIGTERM, etc.),
+# para gravar o que ainda estiver em memória
+EXIT_HOOKS = []
+
+
+def warmup(phase='master'):
+    def decorator(f):
+        WARMUP_HOOKS[phase].append(f)
+        return f
+    return decorator
+
+
+def on_worker_exit(f):
+    EXIT_HOOKS.append(f)
+    return f
+
+
+def run_warmup(app, phase):
+    with app.app_context():
+        for hook in WARMUP_HOOKS[phase]:
+            hook(app)
+
+
+def run(app, bind='127.0.0.1:8000', workers=None, threads=1, max_requests=1000,
+        max_requests_jitter=100, timeout=30):
+    """Serve o app com gunicorn em modo pre-fork (app carregado antes do fork)."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise RuntimeError('O comando serve precisa do gunicorn (pip install gunicorn; não disponível no Windows).')
+
+    from models import db
+
+    class PreforkApplication(BaseApplication):
+        def load_config(self):
+            settings = {
+                'bind': bind,
+                'workers': workers or (os.cpu_count() or 1) * 2 + 1,
+                'threads': threads,
+                'preload_app': True,
+                # Reciclagem: cada worker é substituído depois de N requisições (com
+                # jitter para que não reiniciem todos juntos)
+                'max_requests': max_requests,
+                'max_requests_jitter': max_requests_jitter,
+                'timeout': timeout,
+                'post_fork': self.post_fork,
+                'worker_exit': self.worker_exit,
+            }
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            run_warmup(app, 'master')
+            metrics.reset()
+            # Conexões abertas no aquecimento não podem ser herdadas pelos workers
+            with app.app_context():
+                for engine in db.engines.values():
+                    engine.dispose()
+            return app
+
+        @staticmethod
+        def post_fork(server, worker):
+            run_warmup(app, 'worker')
+
+        @staticmethod
+        def worker_exit(server, worker):
+            with app.app_context():
+                for hook in EXIT_HOOKS:
+                    hook(app)
+
+    PreforkApplication().run()
+
+
+@warmup('master')
+def compile_templates(app):
+    for name in app.jinja_env.list_templates():
+        if name.endswith('.html'):
+            app.jinja_env.get_template(name)
+
+
+@warmup('master')
+def prime_catalog(app):
+    # Renderiza as páginas públicas uma vez: aquece o cache de SQL compilado do
+    # SQLAlchemy, os loaders de relacionamento e as páginas do SQLite no cache do SO
+    client = app.test_client()
+    from models import Course
+    paths = ['/', '/cursos'] + [f'/curso/{course.id}' for course in Course.query.limit(20)]
+    for path in paths:
+        client.get(path)
+
+
+@warmup('worker')
+def open_db_connections(app):
+    from models import db
+    for engine in db.engines.values():
+        size = min(engine.pool.size(), app.config['SERVE_WARM_CONNECTIONS']) if hasattr(engine.pool, 'size') else 1
+        connections = [engine.connect() for _ in range(size)]
+        for connection in connections:
+            connection.close()
@@ -0,0 +1,263 @@
+import base64
+import binascii
+import fcntl
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.orm.exc import ObjectDeletedError
+from werkzeug.exceptions import ClientDisconnected
+from werkzeug.utils import secure_filename
+
+import blobstore
+import metrics
+from models import db, Upload, Lesson, Course
+
+# Uploads retomáveis no estilo do protocolo tus (https://tus.io): o cliente cria
+# o upload com POST, descobre o offset com HEAD e envia pedaços com PATCH.
+TUS_VERSION = '1.0.0'
+TUS_EXTENSIONS = 'creation,checksum,termination'
+CHUNK_SIZE = 64 * 1024
+
+# target -> (modelo, coluna que recebe o nome do arquivo, pasta de destino;
+# None = blob store de imagens públicas)
+TARGETS = {
+    'lesson_video': (Lesson, 'video_file', 'VIDEO_FOLDER'),
+    'lesson_material': (Lesson, 'material_file', 'MATERIAL_FOLDER'),
+    'course_image': (Course, 'image', None),
+}
+
+# upload id -> (offset, sha256 parcial, último uso) deste processo, para não reler o
+# arquivo a cada PATCH. Entradas paradas há mais de UPLOAD_EXPIRY_HOURS são descartadas
+# (o upload delas também expira, e um PATCH tardio só recalcula o hash lendo o disco).
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_metadata(header):
+    """Decodifica ``Upload-Metadata``: pares "chave valor-base64" separados por vírgula."""
+    metadata = {}
+    for pair in filter(None, (header or '').split(',')):
+        key, _, value = pair.strip().partition(' ')
+        try:
+            metadata[key] = base64.b64decode(value).decode('utf-8') if value else ''
+        except (binascii.Error, UnicodeDecodeError):
+            raise UploadError(f'Metadado inválido: {key}')
+    return metadata
+
+
+def parse_checksum(header):
+    if not header:
+        return None
+    algorithm, _, value = header.partition(' ')
+    if algorithm != 'sha256':
+        raise UploadError('Algoritmo de checksum não suportado', 400)
+    try:
+        return base64.b64decode(value)
+    except binascii.Error:
+        raise UploadError('Checksum inválido', 400)
+
+
+def part_path(upload):
+    return os.path.join(current_app.config['UPLOAD_PARTIAL_FOLDER'], f'{upload.id}.part')
+
+
+def create(user, length, metadata):
+    target = metadata.get('target')
+    if target not in TARGETS:
+        raise UploadError('Destino do upload inválido')
+    model = TARGETS[target][0]
+    try:
+        target_id = int(metadata.get('target_id', ''))
+    except ValueError:
+        raise UploadError('Destino do upload inválido')
+    if db.session.get(model, target_id) is None:
+        raise UploadError('Destino do upload não encontrado', 404)
+    filename = secure_filename(metadata.get('filename', ''))
+    if not filename:
+        raise UploadError('Nome de arquivo inválido')
+    if length < 0 or length > current_app.config['UPLOAD_MAX_SIZE']:
+        raise UploadError('Arquivo maior que o permitido', 413)
+
+    upload = Upload(id=uuid.uuid4().hex, user_id=user.id, filename=filename,
+                    target=target, target_id=target_id, length=length, offset=0)
+    open(part_path(upload), 'wb').close()
+    db.session.add(upload)
+    if length == 0:
+        finish(upload, hashlib.sha256())
+    return upload
+
+
+def _expiry():
+    return timedelta(hours=current_app.config['UPLOAD_EXPIRY_HOURS'])
+
+
+def _prune_hashers():
+    cutoff = time.monotonic() - _expiry().total_seconds()
+    with _hashers_lock:
+        for upload_id in [key for key, (_o, _h, used) in _hashers.items() if used < cutoff]:
+            del _hashers[upload_id]
+
+
+def _forget(upload_id):
+    with _hashers_lock:
+        _hashers.pop(upload_id, None)
+
+
+@contextmanager
+def locked(upload):
+    """Trava o upload (entre threads e processos) enquanto um PATCH ou DELETE o altera.
+
+    A trava é um flock no arquivo parcial; o chamador deve fazer o commit dentro do bloco,
+    para que o próximo PATCH já leia o offset gravado. Outro PATCH em andamento dá 409.
+    """
+    try:
+        fd = os.open(part_path(upload), os.O_RDWR)
+    except FileNotFoundError:
+        if upload.completed_at is not None:
+            raise UploadError('Upload já concluído', 403)
+        raise UploadError('Upload não encontrado', 404)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError('Outro envio deste upload está em andamento', 409)
+        # O offset lido antes da trava pode já ter sido avançado por quem a segurava
+        try:
+            db.session.refresh(upload)
+        except ObjectDeletedError:
+            raise UploadError('Upload não encontrado', 404)
+        yield upload
+    finally:
+        os.close(fd)
+
+
+def _running_hash(upload):
+    with _hashers_lock:
+        cached = _hashers.get(upload.id)
+    if cached and cached[0] == upload.offset:
+        metrics.inc('cache_requests_total', cache='upload_hash', result='hit')
+        return cached[1]
+    metrics.inc('cache_requests_total', cache='upload_hash', result='miss')
+    # Retomada em outro processo (ou após reinício): recalcula lendo o que já está no disco
+    hasher = hashlib.sha256()
+    remaining = upload.offset
+    with open(part_path(upload), 'rb') as f:
+        while remaining:
+            block = f.read(min(CHUNK_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def append(upload, stream, offset, checksum_header=None):
+    """Grava um pedaço vindo de ``stream`` a partir de ``offset``, em blocos de CHUNK_SIZE.
+
+    Se o cliente mandar ``Upload-Checksum`` e o pedaço não bater (ou a conexão cair),
+    o pedaço é descartado; sem checksum, o que chegou antes da queda é mantido.
+    """
+    if upload.completed_at is not None:
+        raise UploadError('Upload já concluído', 403)
+    if offset != upload.offset:
+        raise UploadError('Upload-Offset não corresponde ao servidor', 409)
+    expected = parse_checksum(checksum_header)
+
+    running = _running_hash(upload).copy()
+    chunk_hash = hashlib.sha256()
+    written = 0
+    disconnected = False
+    with open(part_path(upload), 'r+b') as f:
+        f.seek(upload.offset)
+        f.truncate()
+        try:
+            while True:
+                block = stream.read(CHUNK_SIZE)
+                if not block:
+                    break
+                if upload.offset + written + len(block) > upload.length:
+                    raise UploadError('Dados além do tamanho declarado', 413)
+                f.write(block)
+                running.update(block)
+                chunk_hash.update(block)
+                written += len(block)
+        except ClientDisconnected:
+            disconnected = True
+        except UploadError:
+            f.seek(upload.offset)
+            f.truncate()
+            raise
+        if expected is not None and (disconnected or chunk_hash.digest() != expected):
+            f.seek(upload.offset)
+            f.truncate()
+            raise UploadError('Checksum não confere', 460)
+
+    upload.offset += written
+    _prune_hashers()
+    with _hashers_lock:
+        _hashers[upload.id] = (upload.offset, running, time.monotonic())
+    if upload.offset == upload.length:
+        finish(upload, running)
+    return upload
+
+
+def finish(upload, hasher):
+    model, column, folder_key = TARGETS[upload.target]
+    item = db.session.get(model, upload.target_id)
+    if item is None:
+        raise UploadError('Destino do upload não encontrado', 404)
+    if folder_key is None:
+        filename = blobstore.store_path(part_path(upload), upload.filename)
+    else:
+        filename = f'{upload.target}-{upload.target_id}-{upload.id[:8]}-{upload.filename}'
+        shutil.move(part_path(upload), os.path.join(current_app.config[folder_key], filename))
+    setattr(item, column, filename)
+    upload.checksum = hasher.hexdigest()
+    upload.completed_at = datetime.utcnow()
+    _forget(upload.id)
+
+
+def discard(upload):
+    _forget(upload.id)
+    try:
+        os.remove(part_path(upload))
+    except FileNotFoundError:
+        pass
+    db.session.delete(upload)
+
+
+def expire():
+    """Remove os uploads não concluídos sem nenhum pedaço há mais de UPLOAD_EXPIRY_HOURS.
+
+    A última atividade é a data de modificação do arquivo parcial (cada PATCH grava nele).
+    Retorna os uploads removidos; o chamador faz o commit.
+    """
+    cutoff = datetime.utcnow() - _expiry()
+    expired = []
+    candidates = Upload.query.filter(Upload.completed_at.is_(None), Upload.created_at < cutoff).all()
+    for upload in candidates:
+        try:
+            with locked(upload):
+                if datetime.utcfromtimestamp(os.path.getmtime(part_path(upload))) >= cutoff:
+                    continue
+                discard(upload)
+        except UploadError as exc:
+            if exc.status == 409:  # recebendo um pedaço agora: não expirou
+                continue
+            discard(upload)  # arquivo parcial já não existe
+        expired.append(upload)
+    _prune_hashers()
+    return expired